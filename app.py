@@ -1,5 +1,29 @@
-﻿import os
+﻿import argparse
+import os
 import sys
+from typing import Dict, List
+
+
+def parse_request(argv: List[str]) -> Dict:
+    parser = argparse.ArgumentParser(prog="cmd")
+    parser.add_argument("--run", metavar="COMMAND_ID")
+    parser.add_argument("--param", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--history", action="store_true")
+    parser.add_argument("--tail", action="store_true")
+    args, _unknown = parser.parse_known_args(argv)
+
+    if args.run:
+        params: Dict[str, str] = {}
+        for item in args.param:
+            key, _, value = item.partition("=")
+            if key:
+                params[key] = value
+        return {"action": "run", "command_id": args.run, "params": params}
+    if args.history:
+        return {"action": "history"}
+    if args.tail:
+        return {"action": "tail"}
+    return {"action": "show"}
 
 
 def main() -> int:
@@ -10,27 +34,52 @@ def main() -> int:
     if app_root not in sys.path:
         sys.path.insert(0, app_root)
 
-    from PySide6.QtWidgets import QApplication
+    from core.single_instance import SingleInstanceServer, send_request, server_name
+
+    request = parse_request(sys.argv[1:])
+    if request["action"] == "tail":
+        from core.output_sinks import tail_output
 
-    from core.config_loader import get_app_root, load_commands
+        return tail_output()
+    if send_request(request):
+        return 0
+
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
+    from core.config_loader import CommandCatalog, get_app_root
     from core.logger import AppLogger
     from ui.main_window import MainWindow
 
     app = QApplication([])
     app_root = get_app_root()
-    commands = load_commands(app_root)
-    # print(commands)
+    try:
+        catalog = CommandCatalog(app_root)
+    except ValueError as exc:
+        QMessageBox.critical(None, "CmdLauncher", f"命令配置错误：\n{exc}")
+        return 1
+    # print(catalog.all_commands())
     logger = AppLogger(app_root)
 
-    window = MainWindow(commands, logger, app_root)
+    instance = SingleInstanceServer()
+    if not instance.listen():
+        # Another instance won the startup race: hand the request over to it.
+        if send_request(request):
+            return 0
+        logger.log_block([f"single_instance=cannot listen on {server_name()}, running without IPC"])
+
+    window = MainWindow(catalog, logger, app_root, instance)
+    instance.request_received.connect(window.handle_request)
     window.show()
+    if request["action"] != "show":
+        window.handle_request(request)
 
     exit_code = app.exec()
+    instance.close()
     if exit_code == 1000:
         if getattr(sys, "frozen", False):
             os.execl(sys.executable, sys.executable)
         else:
-            os.execl(sys.executable, sys.executable, *sys.argv)
+            os.execl(sys.executable, sys.executable, sys.argv[0])
     return exit_code
 
 
@@ -0,0 +1,65 @@
+﻿import re
+from typing import Dict, List, Optional
+
+from .models import CommandDefinition, ParamDefinition
+from .template import CompiledTemplate, template_backend
+
+CAPTURE_REF = re.compile(r"\{(\w+)\.(\w+)\}")
+
+
+def resolve_param_values(params: List[ParamDefinition], values: Dict[str, str]) -> Dict[str, str]:
+    resolved: Dict[str, str] = {}
+    for param in params:
+        value = values.get(param.param_id, "")
+        if not value and param.default is not None:
+            value = str(param.default)
+        resolved[param.param_id] = value
+    return resolved
+
+
+def validate_param_values(params: List[ParamDefinition], values: Dict[str, str]) -> List[str]:
+    errors: List[str] = []
+    for param in params:
+        value = values.get(param.param_id, "")
+        if param.required and not value:
+            errors.append(f"{param.label} is required.")
+            continue
+        if param.kind == "int" and value:
+            try:
+                number = int(value)
+            except ValueError:
+                errors.append(f"{param.label} must be an integer.")
+                continue
+            if param.min_value is not None and number < param.min_value:
+                errors.append(f"{param.label} must be >= {param.min_value}.")
+            if param.max_value is not None and number > param.max_value:
+                errors.append(f"{param.label} must be <= {param.max_value}.")
+        if param.choices and value:
+            if value not in param.choices:
+                allowed = ", ".join(param.choices)
+                errors.append(f"{param.label} must be one of: {allowed}.")
+    return errors
+
+
+def build_command_string(command: CommandDefinition, resolved: Dict[str, str]) -> str:
+    compiled = command.compiled
+    if compiled is None:
+        backend = template_backend(command.kind, command.admin)
+        compiled = CompiledTemplate.compile(command.template, command.params, backend, command.command_id)
+    return compiled.render(resolved)
+
+
+def start_command(
+    runner,
+    command: CommandDefinition,
+    command_str: str,
+    values: Dict[str, str],
+    timeout: Optional[float] = None,
+) -> bool:
+    if command.kind in ("handler", "workflow"):
+        return runner.start(command, values, command_str, timeout)
+    if command.admin:
+        program = "powershell"
+        args = ["-NoProfile", "-WindowStyle", "Hidden", "-Command", command_str]
+        return runner.start_with_args(command, program, args, command_str, timeout)
+    return runner.start(command, command_str, timeout)
@@ -32,6 +32,7 @@ class CommandRunner(QObject):
         self._process.readyReadStandardOutput.connect(self._read_stdout)
         self._process.readyReadStandardError.connect(self._read_stderr)
         self._process.finished.connect(self._on_finished)
+        self._process.errorOccurred.connect(self._on_error)
         self._timer.timeout.connect(self._on_timeout)
 
     @property
@@ -42,7 +43,9 @@ class CommandRunner(QObject):
     def command_str(self) -> str:
         return self._command_str
 
-    def start(self, command: CommandDefinition, command_str: str) -> bool:
+    def start(
+        self, command: CommandDefinition, command_str: str, timeout: Optional[float] = None
+    ) -> bool:
         if self._running:
             return False
 
@@ -61,13 +64,18 @@ class CommandRunner(QObject):
             self._process.setArguments(["/c", full_command])
         self._process.start()
         self.started.emit(command.label)
-
-        if command.timeout > 0:
-            self._timer.start(command.timeout * 1000)
+        self._start_timer(command, timeout)
 
         return True
 
-    def start_with_args(self, command: CommandDefinition, program: str, args: list, display: str) -> bool:
+    def start_with_args(
+        self,
+        command: CommandDefinition,
+        program: str,
+        args: list,
+        display: str,
+        timeout: Optional[float] = None,
+    ) -> bool:
         if self._running:
             return False
 
@@ -82,12 +90,14 @@ class CommandRunner(QObject):
         self._process.setArguments(args)
         self._process.start()
         self.started.emit(command.label)
-
-        if command.timeout > 0:
-            self._timer.start(command.timeout * 1000)
+        self._start_timer(command, timeout)
 
         return True
 
+    def stop(self) -> None:
+        if self._running:
+            self._process.kill()
+
     def set_output_encoding(self, encoding: Optional[str]) -> None:
         self._encoding_override = encoding
 
@@ -109,6 +119,11 @@ class CommandRunner(QObject):
         )
         return result > 32
 
+    def _start_timer(self, command: CommandDefinition, timeout: Optional[float]) -> None:
+        seconds = command.timeout if timeout is None else timeout
+        if seconds > 0 and self._running:
+            self._timer.start(int(seconds * 1000))
+
     def _read_stdout(self) -> None:
         data = self._process.readAllStandardOutput().data()
         text = self._decode_output(data)
@@ -126,6 +141,22 @@ class CommandRunner(QObject):
             self._timed_out = True
             self._process.kill()
 
+    def _on_error(self, error) -> None:
+        # A process that never starts emits no finished signal; report it as one
+        # so callers waiting on finished are not left hanging. The report is
+        # deferred: a caller that starts its next command from finished must not
+        # reuse the QProcess while it is still inside errorOccurred.
+        if error != QProcess.ProcessError.FailedToStart or not self._running:
+            return
+        self._timer.stop()
+        message = f"{self._process.errorString()}\n"
+        QTimer.singleShot(0, self, lambda: self._report_failed_start(message))
+
+    def _report_failed_start(self, message: str) -> None:
+        self._running = False
+        self.output_received.emit(message)
+        self.finished.emit(-1, False, message)
+
     def _on_finished(self, exit_code: int, _status) -> None:
         self._timer.stop()
         self._running = False
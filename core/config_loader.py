@@ -1,9 +1,13 @@
 ﻿import json
 import os
 import sys
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .models import CommandDefinition, ParamDefinition
+from .command_builder import CAPTURE_REF, resolve_param_values, validate_param_values
+from .models import AdaptiveTimeout, CommandDefinition, ParamDefinition, WorkflowNode
+from .template import CompiledTemplate, template_backend
+
+WORKFLOW_POLICIES = ("fail_fast", "continue")
 
 
 def get_app_root() -> str:
@@ -32,24 +36,333 @@ def _parse_params(raw_params: list) -> List[ParamDefinition]:
     return params
 
 
-def load_commands(app_root: str) -> List[CommandDefinition]:
-    config_path = os.path.join(app_root, "config", "commands.json")
-    with open(config_path, "r", encoding="utf-8-sig") as handle:
-        raw = json.load(handle)
-
-    commands: List[CommandDefinition] = []
-    for item in raw.get("commands", []):
-        commands.append(
-            CommandDefinition(
-                command_id=item["id"],
-                label=item["label"],
-                description=item.get("description", ""),
-                kind=item.get("kind", "command"),
-                template=item.get("template", ""),
-                params=_parse_params(item.get("params", [])),
-                timeout=int(item.get("timeout", 10)),
-                admin=bool(item.get("admin", False)),
+def _parse_adaptive_timeout(raw) -> Optional[AdaptiveTimeout]:
+    if not raw:
+        return None
+    if raw is True:
+        raw = {}
+    return AdaptiveTimeout(
+        factor=float(raw.get("factor", 3)),
+        floor=float(raw.get("min", 1)),
+        ceiling=float(raw.get("max", 300)),
+        min_samples=int(raw.get("min_samples", 10)),
+    )
+
+
+def _parse_nodes(raw_nodes: list) -> Tuple[WorkflowNode, ...]:
+    nodes: List[WorkflowNode] = []
+    for item in raw_nodes:
+        nodes.append(
+            WorkflowNode(
+                node_id=item["id"],
+                command_id=item["command"],
+                depends=tuple(item.get("depends", [])),
+                params={key: str(value) for key, value in item.get("params", {}).items()},
+                capture=dict(item.get("capture", {})),
             )
         )
+    return tuple(nodes)
+
+
+def _validate_workflow(command: CommandDefinition, lookup: Callable[[str], Optional[CommandDefinition]]) -> None:
+    if command.policy not in WORKFLOW_POLICIES:
+        raise ValueError(f"workflow {command.command_id}: unknown policy {command.policy!r}")
+    node_ids = [node.node_id for node in command.nodes]
+    if len(set(node_ids)) != len(node_ids):
+        raise ValueError(f"workflow {command.command_id}: duplicate node id")
+    for node in command.nodes:
+        target = lookup(node.command_id)
+        if target is None or target.kind in ("group", "workflow"):
+            raise ValueError(f"workflow {command.command_id}: node {node.node_id} references {node.command_id!r}")
+        declared = {param.param_id for param in target.params}
+        for param_id in node.params:
+            if param_id not in declared:
+                raise ValueError(f"workflow {command.command_id}: node {node.node_id} sets undeclared parameter {param_id!r}")
+        # Values filled from upstream captures are only known at run time.
+        literal = {key: value for key, value in node.params.items() if not CAPTURE_REF.search(value)}
+        checked = [param for param in target.params if param.param_id not in node.params or param.param_id in literal]
+        errors = validate_param_values(checked, resolve_param_values(checked, literal))
+        if errors:
+            raise ValueError(f"workflow {command.command_id}: node {node.node_id}: {' '.join(errors)}")
+        for dependency in node.depends:
+            if dependency not in node_ids:
+                raise ValueError(f"workflow {command.command_id}: node {node.node_id} depends on {dependency!r}")
+
+    remaining = {node.node_id: set(node.depends) for node in command.nodes}
+    while remaining:
+        ready = [node_id for node_id, depends in remaining.items() if not depends]
+        if not ready:
+            raise ValueError(f"workflow {command.command_id}: dependency cycle in {sorted(remaining)}")
+        for node_id in ready:
+            del remaining[node_id]
+        for depends in remaining.values():
+            depends.difference_update(ready)
+
+    # A {node.name} reference only resolves if that node is guaranteed to have
+    # finished first and actually captures the name.
+    nodes = {node.node_id: node for node in command.nodes}
+    for node in command.nodes:
+        upstream = set()
+        pending = list(node.depends)
+        while pending:
+            node_id = pending.pop()
+            if node_id not in upstream:
+                upstream.add(node_id)
+                pending.extend(nodes[node_id].depends)
+        for value in node.params.values():
+            for match in CAPTURE_REF.finditer(value):
+                source, name = match.groups()
+                if source not in upstream:
+                    raise ValueError(f"workflow {command.command_id}: node {node.node_id} uses {match.group(0)} but does not depend on {source!r}")
+                if name not in nodes[source].capture:
+                    raise ValueError(f"workflow {command.command_id}: node {node.node_id} uses {match.group(0)} but {source!r} does not capture {name!r}")
+
+
+def _build_command(item: dict) -> CommandDefinition:
+    kind = item.get("kind", "command")
+    template = item.get("template", "")
+    params = _parse_params(item.get("params", []))
+    admin = bool(item.get("admin", False))
+    compiled = CompiledTemplate.compile(template, params, template_backend(kind, admin), owner=item["id"])
+    return CommandDefinition(
+        command_id=item["id"],
+        label=item["label"],
+        description=item.get("description", ""),
+        kind=kind,
+        template=template,
+        params=params,
+        timeout=int(item.get("timeout", 10)),
+        admin=admin,
+        handler=item.get("handler"),
+        priority=int(item.get("priority", 0)),
+        adaptive_timeout=_parse_adaptive_timeout(item.get("adaptive_timeout")),
+        nodes=_parse_nodes(item.get("nodes", [])),
+        policy=item.get("policy", "fail_fast"),
+        compiled=compiled,
+    )
+
 
+# Parsed JSON and built fragments are cached per file, keyed by mtime and size,
+# so a refresh after one team edits their file re-parses only that file.
+_JSON_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_FRAGMENT_CACHE: Dict[str, Tuple[tuple, List[CommandDefinition]]] = {}
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_json(path: str) -> Any:
+    try:
+        stamp = _file_stamp(path)
+    except OSError as exc:
+        raise ValueError(f"{path}: {exc.strerror}") from exc
+    cached = _JSON_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r", encoding="utf-8-sig") as handle:
+        try:
+            data = json.load(handle)
+        except ValueError as exc:
+            raise ValueError(f"{path}: {exc}") from exc
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: top-level value must be a JSON object")
+    _JSON_CACHE[path] = (stamp, data)
+    return data
+
+
+def _load_fragment(path: str, overrides: Dict[str, dict], overrides_key: tuple) -> List[CommandDefinition]:
+    raw = _read_json(path)
+    key = (_JSON_CACHE[path][0], overrides_key)
+    cached = _FRAGMENT_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    commands = [_build_entry(path, item, overrides) for item in _entries(path, raw.get("commands", []))]
+    _FRAGMENT_CACHE[path] = (key, commands)
     return commands
+
+
+def _entries(path: str, raw: Any) -> List[dict]:
+    if not isinstance(raw, list) or not all(isinstance(item, dict) for item in raw):
+        raise ValueError(f"{path}: expected a list of objects")
+    return raw
+
+
+def _build_entry(path: str, item: dict, overrides: Dict[str, dict]) -> CommandDefinition:
+    # Shape errors (missing fields, wrong types) surface as ValueError naming the
+    # file, so callers only ever need to handle one kind of config error.
+    owner = item.get("id", "?")
+    try:
+        return _build_command({**item, **overrides.get(owner, {})})
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}") from exc
+    except KeyError as exc:
+        raise ValueError(f"{path}: command {owner}: missing field {exc}") from exc
+    except (TypeError, AttributeError) as exc:
+        raise ValueError(f"{path}: command {owner}: {exc}") from exc
+
+
+def _group_definition(item: dict) -> CommandDefinition:
+    return CommandDefinition(
+        command_id=item["id"],
+        label=item.get("label", item["id"]),
+        description=item.get("description", ""),
+        kind="group",
+        template="",
+        params=[],
+        timeout=0,
+        admin=False,
+    )
+
+
+class CommandCatalog:
+    def __init__(self, app_root: str) -> None:
+        self._app_root = app_root
+        self._groups: List[CommandDefinition] = []
+        self._group_files: Dict[str, str] = {}
+        self._expanded: Dict[str, bool] = {}
+        self._loaded: Dict[str, List[CommandDefinition]] = {}
+        self._validating: Dict[str, List[CommandDefinition]] = {}
+        self._overrides: Dict[str, dict] = {}
+        self._overrides_key: tuple = ()
+        self.refresh()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self._app_root, "config", "catalog", "index.json")
+
+    @property
+    def single_file_path(self) -> str:
+        return os.path.join(self._app_root, "config", "commands.json")
+
+    def refresh(self) -> None:
+        self._groups = []
+        self._group_files = {}
+        self._expanded = {}
+        self._loaded = {}
+        self._overrides = {}
+        self._overrides_key = ()
+        if os.path.exists(self.index_path):
+            self._read_index(self.index_path, (), set())
+        else:
+            self._read_single_file()
+
+    def groups(self) -> List[CommandDefinition]:
+        return list(self._groups)
+
+    def expanded_by_default(self, group_id: str) -> bool:
+        return self._expanded.get(group_id, False)
+
+    def is_loaded(self, group_id: str) -> bool:
+        return group_id in self._loaded
+
+    def commands_for(self, group_id: str) -> List[CommandDefinition]:
+        if group_id in self._loaded:
+            return self._loaded[group_id]
+        path = self._group_files[group_id]
+        commands = _load_fragment(path, self._overrides, self._overrides_key)
+        # Visible to find() while validating so workflows can reference commands
+        # in their own or a mutually referencing fragment, but only cached once
+        # every workflow in it has passed.
+        self._validating[group_id] = commands
+        try:
+            for command in commands:
+                if command.kind == "workflow":
+                    _validate_workflow(command, self.find)
+        finally:
+            del self._validating[group_id]
+        self._loaded[group_id] = commands
+        return commands
+
+    def find(self, command_id: str) -> Optional[CommandDefinition]:
+        for fragment in list(self._loaded.values()) + list(self._validating.values()):
+            for command in fragment:
+                if command.command_id == command_id:
+                    return command
+        group_id = self._group_of(command_id)
+        if group_id is None:
+            return None
+        for command in self.commands_for(group_id):
+            if command.command_id == command_id:
+                return command
+        return None
+
+    def _group_of(self, command_id: str) -> Optional[str]:
+        # Scan the raw JSON (cached) instead of compiling every group, so a
+        # broken fragment only hides its own commands.
+        for group in self._groups:
+            group_id = group.command_id
+            if group_id in self._loaded or group_id in self._validating or group_id not in self._group_files:
+                continue
+            try:
+                items = _read_json(self._group_files[group_id]).get("commands", [])
+            except ValueError:
+                continue
+            if isinstance(items, list) and any(isinstance(item, dict) and item.get("id") == command_id for item in items):
+                return group_id
+        return None
+
+    def all_commands(self) -> List[CommandDefinition]:
+        commands: List[CommandDefinition] = []
+        for group in self._groups:
+            if group.command_id:
+                commands.append(group)
+            commands.extend(self.commands_for(group.command_id))
+        return commands
+
+    def _read_index(self, path: str, stack: Tuple[str, ...], seen: set) -> None:
+        path = os.path.abspath(path)
+        if path in stack:
+            raise ValueError(f"{path}: include cycle")
+        if path in seen:
+            return
+        seen.add(path)
+        stack = stack + (path,)
+        raw = _read_json(path)
+        base = os.path.dirname(path)
+
+        for item in _entries(path, raw.get("groups", [])):
+            if not isinstance(item.get("id"), str) or not isinstance(item.get("file"), str):
+                raise ValueError(f"{path}: group entries need string \"id\" and \"file\" fields")
+            group = _group_definition(item)
+            if group.command_id in self._group_files:
+                continue
+            self._groups.append(group)
+            self._group_files[group.command_id] = os.path.join(base, item["file"])
+            self._expanded[group.command_id] = bool(item.get("expanded", False))
+
+        for include in raw.get("include", []):
+            self._read_index(os.path.join(base, include), stack, seen)
+
+        for override_file in raw.get("overrides", []):
+            override_path = os.path.join(base, override_file)
+            overrides = _read_json(override_path).get("commands", {})
+            if not isinstance(overrides, dict) or not all(isinstance(fields, dict) for fields in overrides.values()):
+                raise ValueError(f"{override_path}: \"commands\" must map command ids to objects")
+            for command_id, fields in overrides.items():
+                self._overrides.setdefault(command_id, {}).update(fields)
+            self._overrides_key += ((override_path, _JSON_CACHE[override_path][0]),)
+
+    def _read_single_file(self) -> None:
+        # The classic single commands.json: groups are inline markers and every
+        # command is parsed up front, so all groups start out loaded.
+        commands = _load_fragment(self.single_file_path, {}, ())
+        current = _group_definition({"id": "", "label": ""})
+        self._groups.append(current)
+        self._loaded[current.command_id] = []
+        for command in commands:
+            if command.kind == "group":
+                current = command
+                self._groups.append(current)
+                self._loaded[current.command_id] = []
+            else:
+                self._loaded[current.command_id].append(command)
+            self._expanded[current.command_id] = True
+        for command in commands:
+            if command.kind == "workflow":
+                _validate_workflow(command, self.find)
+
+
+def load_commands(app_root: str) -> List[CommandDefinition]:
+    return CommandCatalog(app_root).all_commands()
@@ -0,0 +1,98 @@
+﻿import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from .handlers import HandlerContext, get_handler
+from .models import CommandDefinition
+
+_JOB_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="handler")
+_WORK_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="handler-io")
+
+
+class HandlerRunner(QObject):
+    output_received = Signal(str)
+    started = Signal(str)
+    finished = Signal(int, bool, str)
+
+    _chunk_ready = Signal(str)
+    _job_done = Signal(int)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._chunks: List[str] = []
+        self._running = False
+        self._command_str = ""
+        self._timed_out = False
+        self._cancel_event = threading.Event()
+
+        self._chunk_ready.connect(self._on_chunk)
+        self._job_done.connect(self._on_job_done)
+        self._timer.timeout.connect(self._on_timeout)
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def command_str(self) -> str:
+        return self._command_str
+
+    def start(
+        self,
+        command: CommandDefinition,
+        params: Dict[str, str],
+        display: str,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        if self._running:
+            return False
+
+        handler = get_handler(command.handler or command.command_id)
+        if handler is None:
+            return False
+
+        self._chunks = []
+        self._command_str = display
+        self._timed_out = False
+        self._running = True
+        self._cancel_event = threading.Event()
+
+        context = HandlerContext(self._chunk_ready.emit, self._cancel_event, _WORK_POOL)
+        _JOB_POOL.submit(self._run_job, handler, context, dict(params))
+        self.started.emit(command.label)
+
+        seconds = command.timeout if timeout is None else timeout
+        if seconds > 0:
+            self._timer.start(int(seconds * 1000))
+
+        return True
+
+    def stop(self) -> None:
+        self._cancel_event.set()
+
+    def _run_job(self, handler, context: HandlerContext, params: Dict[str, str]) -> None:
+        try:
+            exit_code = int(handler(context, params) or 0)
+        except Exception:
+            context.write(traceback.format_exc())
+            exit_code = 1
+        self._job_done.emit(exit_code)
+
+    def _on_chunk(self, text: str) -> None:
+        self._chunks.append(text)
+        self.output_received.emit(text)
+
+    def _on_timeout(self) -> None:
+        if self._running:
+            self._timed_out = True
+            self._cancel_event.set()
+
+    def _on_job_done(self, exit_code: int) -> None:
+        self._timer.stop()
+        self._running = False
+        self.finished.emit(exit_code, self._timed_out, "".join(self._chunks))
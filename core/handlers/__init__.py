@@ -0,0 +1,4 @@
+from .registry import HandlerContext, get_handler, register_handler
+from . import disk_usage, temp_cleaner  # noqa: F401  (registers built-in handlers)
+
+__all__ = ["HandlerContext", "get_handler", "register_handler"]
@@ -0,0 +1,43 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class HandlerContext:
+    def __init__(
+        self,
+        emit: Callable[[str], None],
+        cancel_event: threading.Event,
+        pool: ThreadPoolExecutor,
+    ) -> None:
+        self._emit = emit
+        self._cancel_event = cancel_event
+        self._pool = pool
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        return self._pool
+
+    def write(self, text: str) -> None:
+        self._emit(text)
+
+
+HandlerFunc = Callable[[HandlerContext, Dict[str, str]], int]
+
+_HANDLERS: Dict[str, HandlerFunc] = {}
+
+
+def register_handler(name: str) -> Callable[[HandlerFunc], HandlerFunc]:
+    def decorator(func: HandlerFunc) -> HandlerFunc:
+        _HANDLERS[name] = func
+        return func
+
+    return decorator
+
+
+def get_handler(name: str) -> Optional[HandlerFunc]:
+    return _HANDLERS.get(name)
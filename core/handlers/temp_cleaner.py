@@ -0,0 +1,146 @@
+import os
+import tempfile
+import time
+from concurrent.futures import as_completed
+from typing import Dict, Tuple
+
+from .registry import HandlerContext, register_handler
+
+PROGRESS_INTERVAL = 0.5
+
+
+def format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def _remove_tree(path: str, dry_run: bool, context: HandlerContext) -> Tuple[int, int, int]:
+    removed = 0
+    freed = 0
+    failed = 0
+    try:
+        with os.scandir(path) as entries:
+            children = list(entries)
+    except OSError:
+        return 0, 0, 1
+
+    for entry in children:
+        if context.cancelled:
+            return removed, freed, failed
+        sub_removed, sub_freed, sub_failed = _remove_entry(entry, dry_run, context)
+        removed += sub_removed
+        freed += sub_freed
+        failed += sub_failed
+
+    if dry_run:
+        return removed + 1, freed, failed
+    if failed or context.cancelled:
+        return removed, freed, failed
+    try:
+        os.rmdir(path)
+    except OSError:
+        return removed, freed, failed + 1
+    return removed + 1, freed, failed
+
+
+def _is_link(entry: os.DirEntry) -> bool:
+    # Junctions report is_dir(follow_symlinks=False) on Windows; walking into
+    # one would delete the contents of its target, which may be outside TEMP.
+    is_junction = getattr(entry, "is_junction", None)
+    try:
+        return entry.is_symlink() or bool(is_junction and is_junction())
+    except OSError:
+        return False
+
+
+def _remove_link(entry: os.DirEntry, dry_run: bool, context: HandlerContext) -> Tuple[int, int, int]:
+    if dry_run:
+        return 1, 0, 0
+    if context.cancelled:
+        return 0, 0, 0
+    try:
+        os.unlink(entry.path)
+    except OSError:
+        try:
+            os.rmdir(entry.path)
+        except OSError:
+            return 0, 0, 1
+    return 1, 0, 0
+
+
+def _remove_file(entry: os.DirEntry, dry_run: bool, context: HandlerContext) -> Tuple[int, int, int]:
+    try:
+        size = entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        size = 0
+    if dry_run:
+        return 1, size, 0
+    if context.cancelled:
+        return 0, 0, 0
+    try:
+        os.unlink(entry.path)
+    except OSError:
+        return 0, 0, 1
+    return 1, size, 0
+
+
+def _remove_entry(entry: os.DirEntry, dry_run: bool, context: HandlerContext) -> Tuple[int, int, int]:
+    if context.cancelled:
+        return 0, 0, 0
+    if _is_link(entry):
+        return _remove_link(entry, dry_run, context)
+    try:
+        is_dir = entry.is_dir(follow_symlinks=False)
+    except OSError:
+        is_dir = False
+    if is_dir:
+        return _remove_tree(entry.path, dry_run, context)
+    return _remove_file(entry, dry_run, context)
+
+
+@register_handler("clean_temp")
+def clean_temp(context: HandlerContext, params: Dict[str, str]) -> int:
+    root = params.get("path") or tempfile.gettempdir()
+    dry_run = params.get("mode") == "dry_run"
+    try:
+        with os.scandir(root) as entries:
+            top_level = list(entries)
+    except OSError as exc:
+        context.write(f"无法读取 {root}: {exc}\n")
+        return 1
+
+    prefix = "[预览] " if dry_run else ""
+    context.write(f"{prefix}{root}: {len(top_level)} 项待处理\n")
+
+    futures = [context.pool.submit(_remove_entry, entry, dry_run, context) for entry in top_level]
+    removed = 0
+    freed = 0
+    failed = 0
+    done = 0
+    last_report = time.monotonic()
+    for future in as_completed(futures):
+        if context.cancelled:
+            break
+        entry_removed, entry_freed, entry_failed = future.result()
+        removed += entry_removed
+        freed += entry_freed
+        failed += entry_failed
+        done += 1
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            context.write(f"{prefix}进度 {done}/{len(top_level)}，已释放 {format_size(freed)}\n")
+
+    if context.cancelled:
+        for future in futures:
+            future.cancel()
+        context.write(f"{prefix}已取消：完成 {done}/{len(top_level)} 项，已释放 {format_size(freed)}\n")
+        return 1
+
+    verb = "可删除" if dry_run else "已删除"
+    context.write(f"{prefix}{verb} {removed} 项，释放 {format_size(freed)}，跳过 {failed} 项（占用或无权限）\n")
+    return 0
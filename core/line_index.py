@@ -0,0 +1,115 @@
+import re
+from bisect import bisect_left
+from typing import List, Optional, Pattern, Tuple
+
+MAX_LINES = 500_000
+
+
+def compile_query(query: str, regex: bool) -> Optional[Pattern]:
+    if not query:
+        return None
+    if regex:
+        return re.compile(query, re.IGNORECASE)
+    return re.compile(re.escape(query), re.IGNORECASE)
+
+
+def normalize_newlines(text: str, pending_cr: bool) -> Tuple[str, bool]:
+    # QTextCursor.insertText breaks blocks on a bare \r as well as \n, so text
+    # is normalized to \n before it is indexed or shown. A trailing \r is held
+    # back in case the \n of a \r\n pair arrives in the next chunk.
+    if pending_cr:
+        text = "\r" + text
+    pending_cr = text.endswith("\r")
+    if pending_cr:
+        text = text[:-1]
+    return text.replace("\r\n", "\n").replace("\r", "\n"), pending_cr
+
+
+class LineIndex:
+    def __init__(self, max_lines: int = MAX_LINES) -> None:
+        self._max_lines = max_lines
+        self._lines: List[str] = []
+        self._first = 0
+        self._partial = ""
+        self._pattern: Optional[Pattern] = None
+        self._matches: List[int] = []
+
+    @property
+    def line_count(self) -> int:
+        return self._first + len(self._lines)
+
+    @property
+    def first_line(self) -> int:
+        return self._first
+
+    @property
+    def partial(self) -> str:
+        return self._partial
+
+    @property
+    def pattern(self) -> Optional[Pattern]:
+        return self._pattern
+
+    @property
+    def match_count(self) -> int:
+        return len(self._matches)
+
+    @property
+    def match_numbers(self) -> List[int]:
+        return self._matches
+
+    def line(self, number: int) -> str:
+        return self._lines[number - self._first]
+
+    def append(self, text: str) -> List[Tuple[int, str]]:
+        # Returns the newly matching complete lines so a live filter view can
+        # append them without rescanning anything indexed earlier.
+        if not text:
+            return []
+        parts = (self._partial + text).split("\n")
+        self._partial = parts.pop()
+        start = self.line_count
+        self._lines.extend(parts)
+        matched = self._match_range(start, parts)
+        self._trim()
+        return matched
+
+    def flush(self) -> List[Tuple[int, str]]:
+        if not self._partial:
+            return []
+        return self.append("\n")
+
+    def clear(self) -> None:
+        self._lines = []
+        self._first = 0
+        self._partial = ""
+        self._matches = []
+
+    def set_pattern(self, pattern: Optional[Pattern]) -> None:
+        self._pattern = pattern
+        self._matches = []
+        if pattern is not None:
+            self._match_range(self._first, self._lines)
+
+    def matching_lines(self) -> List[Tuple[int, str]]:
+        return [(number, self.line(number)) for number in self._matches]
+
+    def tail(self, count: int) -> List[str]:
+        return self._lines[-count:] if count else []
+
+    def _match_range(self, start: int, lines: List[str]) -> List[Tuple[int, str]]:
+        if self._pattern is None:
+            return []
+        search = self._pattern.search
+        matched = [(start + offset, line) for offset, line in enumerate(lines) if search(line)]
+        self._matches.extend(number for number, _line in matched)
+        return matched
+
+    def _trim(self) -> None:
+        # Trim in batches so a full index does not shift the list on every chunk.
+        overflow = len(self._lines) - self._max_lines
+        if overflow <= self._max_lines // 10:
+            return
+        del self._lines[:overflow]
+        self._first += overflow
+        del self._matches[: bisect_left(self._matches, self._first)]
@@ -1,12 +1,16 @@
 ﻿import os
 from datetime import datetime
-from typing import Iterable
+from typing import Iterable, Optional
 
 
 class AppLogger:
     def __init__(self, app_root: str) -> None:
         self._path = self._resolve_log_path(app_root)
 
+    @property
+    def path(self) -> str:
+        return self._path
+
     def _resolve_log_path(self, app_root: str) -> str:
         preferred = os.path.join(app_root, "logs", "app.log")
         try:
@@ -36,6 +40,11 @@ class AppLogger:
         exit_code: int,
         timed_out: bool,
         output: str,
+        queue_wait: Optional[float] = None,
+        duration: Optional[float] = None,
+        requesters: Optional[Iterable[str]] = None,
+        timeout: Optional[float] = None,
+        timeout_reason: str = "",
     ) -> None:
         status = "TIMEOUT" if timed_out else f"exit_code={exit_code}"
         lines = [
@@ -43,7 +52,15 @@ class AppLogger:
             f"label={label}",
             f"command={command}",
             f"status={status}",
-            "output:",
-            output.rstrip("\n"),
         ]
+        if queue_wait is not None:
+            lines.append(f"queue_wait={queue_wait:.3f}s")
+        if duration is not None:
+            lines.append(f"duration={duration:.3f}s")
+        if timeout is not None:
+            limit = f"{timeout:.1f}s" if timeout > 0 else "none"
+            lines.append(f"timeout={limit} ({timeout_reason})" if timeout_reason else f"timeout={limit}")
+        if requesters:
+            lines.append(f"requesters={','.join(requesters)}")
+        lines.extend(["output:", output.rstrip("\n")])
         self.log_block(lines)
@@ -1,5 +1,7 @@
 ﻿from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from .template import CompiledTemplate
 
 
 @dataclass(frozen=True)
@@ -16,6 +18,23 @@ class ParamDefinition:
     max_value: Optional[int]
 
 
+@dataclass(frozen=True)
+class AdaptiveTimeout:
+    factor: float
+    floor: float
+    ceiling: float
+    min_samples: int
+
+
+@dataclass(frozen=True)
+class WorkflowNode:
+    node_id: str
+    command_id: str
+    depends: Tuple[str, ...]
+    params: Dict[str, str]
+    capture: Dict[str, str]
+
+
 @dataclass(frozen=True)
 class CommandDefinition:
     command_id: str
@@ -26,3 +45,9 @@ class CommandDefinition:
     params: List[ParamDefinition]
     timeout: int
     admin: bool
+    handler: Optional[str] = None
+    priority: int = 0
+    adaptive_timeout: Optional[AdaptiveTimeout] = None
+    nodes: Tuple[WorkflowNode, ...] = ()
+    policy: str = "fail_fast"
+    compiled: Optional[CompiledTemplate] = None
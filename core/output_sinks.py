@@ -0,0 +1,278 @@
+import codecs
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from .models import CommandDefinition
+from .single_instance import listen_exclusive, server_name
+
+FILE_QUEUE_BYTES = 8 * 1024 * 1024
+FILE_BUFFER_BYTES = 64 * 1024
+MAX_RUN_FILES = 200
+RING_BUFFER_CHARS = 1024 * 1024
+CLIENT_BUFFER_BYTES = 1024 * 1024
+
+
+class RunInfo(NamedTuple):
+    run_id: int
+    command_id: str
+    label: str
+    command_str: str
+    started_at: datetime
+
+
+def tail_server_name() -> str:
+    return f"{server_name()}-tail"
+
+
+class OutputSink:
+    def begin(self, run: RunInfo) -> None:
+        pass
+
+    def write(self, text: str) -> None:
+        pass
+
+    def end(self, exit_code: int, timed_out: bool) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FileTeeSink(OutputSink):
+    # Files are written on a private thread. Output is encoded on the GUI thread
+    # and bounded by bytes in flight; chunks past the limit are dropped and
+    # counted, so a slow disk never blocks the GUI.
+    def __init__(self, directory: str, max_files: int = MAX_RUN_FILES) -> None:
+        self._directory = directory
+        self._max_files = max_files
+        self._handle = None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, name="output-tee", daemon=True)
+        self._thread.start()
+
+    def begin(self, run: RunInfo) -> None:
+        self.dropped = 0
+        self._queue.put(("begin", run))
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        with self._lock:
+            if self._pending_bytes + len(data) > FILE_QUEUE_BYTES:
+                self.dropped += 1
+                return
+            self._pending_bytes += len(data)
+        self._queue.put(("write", data))
+
+    def end(self, exit_code: int, timed_out: bool) -> None:
+        self._queue.put(("end", (exit_code, timed_out, self.dropped)))
+
+    def close(self) -> None:
+        self._queue.put(("close", None))
+        self._thread.join(timeout=2)
+
+    def _loop(self) -> None:
+        while True:
+            kind, payload = self._queue.get()
+            try:
+                if kind == "begin":
+                    self._close_file()
+                    self._open_file(payload)
+                elif kind == "write":
+                    with self._lock:
+                        self._pending_bytes -= len(payload)
+                    if self._handle is not None:
+                        self._handle.write(payload)
+                elif kind == "end":
+                    self._finish_file(*payload)
+                else:
+                    self._close_file()
+                    return
+            except OSError:
+                handle, self._handle = self._handle, None
+                if handle is not None:
+                    try:
+                        handle.close()
+                    except OSError:
+                        pass
+
+    def _open_file(self, run: RunInfo) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        stamp = run.started_at.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self._directory, f"{stamp}-{run.run_id}-{run.command_id}.log")
+        self._handle = open(path, "wb", buffering=FILE_BUFFER_BYTES)
+        self._handle.write(f"# {run.label}: {run.command_str}\n".encode("utf-8"))
+        self._prune()
+
+    def _finish_file(self, exit_code: int, timed_out: bool, dropped: int) -> None:
+        if self._handle is not None:
+            status = "TIMEOUT" if timed_out else f"exit_code={exit_code}"
+            if dropped:
+                self._handle.write(f"\n# dropped {dropped} chunks (disk too slow)".encode("utf-8"))
+            self._handle.write(f"\n# {status}\n".encode("utf-8"))
+        self._close_file()
+
+    def _close_file(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _prune(self) -> None:
+        entries = sorted(
+            (entry for entry in os.scandir(self._directory) if entry.is_file() and entry.name.endswith(".log")),
+            key=lambda entry: entry.stat().st_mtime_ns,
+        )
+        for entry in entries[: max(0, len(entries) - self._max_files)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class RingBufferSink(OutputSink):
+    def __init__(self, max_chars: int = RING_BUFFER_CHARS) -> None:
+        self._max_chars = max_chars
+        self._chunks: Deque[str] = deque()
+        self._size = 0
+        self.run: Optional[RunInfo] = None
+        self.running = False
+
+    def begin(self, run: RunInfo) -> None:
+        self._chunks.clear()
+        self._size = 0
+        self.run = run
+        self.running = True
+
+    def write(self, text: str) -> None:
+        self._chunks.append(text)
+        self._size += len(text)
+        while self._size > self._max_chars and len(self._chunks) > 1:
+            self._size -= len(self._chunks.popleft())
+
+    def end(self, exit_code: int, timed_out: bool) -> None:
+        self.running = False
+
+    def snapshot(self) -> str:
+        return "".join(self._chunks)
+
+
+class LocalSocketSink(QObject):
+    # Qt sockets never block on write: each client's backlog is Qt's own write
+    # buffer, and chunks are dropped while it is over CLIENT_BUFFER_BYTES.
+    def __init__(self, ring: Optional[RingBufferSink] = None, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._ring = ring
+        self._clients: List[QLocalSocket] = []
+        self._dropped: Dict[QLocalSocket, int] = {}
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        listen_exclusive(self._server, tail_server_name())
+
+    def begin(self, run: RunInfo) -> None:
+        self._broadcast(f"=== RUN {run.label}: {run.command_str}\n", force=True)
+
+    def write(self, text: str) -> None:
+        self._broadcast(text)
+
+    def end(self, exit_code: int, timed_out: bool) -> None:
+        status = "TIMEOUT" if timed_out else f"exit_code={exit_code}"
+        self._broadcast(f"\n=== DONE {status}\n", force=True)
+
+    def close(self) -> None:
+        for client in list(self._clients):
+            client.disconnectFromServer()
+        self._server.close()
+
+    def _on_new_connection(self) -> None:
+        while self._server.hasPendingConnections():
+            client = self._server.nextPendingConnection()
+            self._clients.append(client)
+            self._dropped[client] = 0
+            client.disconnected.connect(self._on_disconnected)
+            ring = self._ring
+            if ring is not None and ring.running and ring.run is not None:
+                self._send(client, f"=== RUN {ring.run.label}: {ring.run.command_str}\n" + ring.snapshot(), True)
+
+    def _on_disconnected(self) -> None:
+        client = self.sender()
+        if client in self._clients:
+            self._clients.remove(client)
+        self._dropped.pop(client, None)
+        client.deleteLater()
+
+    def _broadcast(self, text: str, force: bool = False) -> None:
+        for client in list(self._clients):
+            self._send(client, text, force)
+
+    def _send(self, client: QLocalSocket, text: str, force: bool) -> None:
+        data = text.encode("utf-8")
+        if not force and client.bytesToWrite() + len(data) > CLIENT_BUFFER_BYTES:
+            self._dropped[client] += 1
+            return
+        dropped = self._dropped.get(client, 0)
+        if dropped:
+            self._dropped[client] = 0
+            data = f"\n[tail] 输出过快，丢弃了 {dropped} 段\n".encode("utf-8") + data
+        client.write(data)
+
+
+class OutputSinks:
+    def __init__(self, sinks: List) -> None:
+        self._sinks = list(sinks)
+        self._next_run_id = 1
+        self._active = False
+
+    def begin(self, command: CommandDefinition, command_str: str) -> None:
+        run = RunInfo(self._next_run_id, command.command_id, command.label, command_str, datetime.now())
+        self._next_run_id += 1
+        self._active = True
+        for sink in self._sinks:
+            sink.begin(run)
+
+    def write(self, text: str) -> None:
+        if not self._active:
+            return
+        for sink in self._sinks:
+            sink.write(text)
+
+    def end(self, exit_code: int, timed_out: bool) -> None:
+        if not self._active:
+            return
+        self._active = False
+        for sink in self._sinks:
+            sink.end(exit_code, timed_out)
+
+    def close(self) -> None:
+        for sink in self._sinks:
+            sink.close()
+        self._sinks = []
+
+
+def tail_output(timeout_ms: int = 300) -> int:
+    socket = QLocalSocket()
+    socket.connectToServer(tail_server_name())
+    if not socket.waitForConnected(timeout_ms):
+        print("CmdLauncher 未在运行", file=sys.stderr)
+        return 1
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while socket.state() == QLocalSocket.ConnectedState or socket.bytesAvailable():
+            if not socket.bytesAvailable() and not socket.waitForReadyRead(1000):
+                continue
+            sys.stdout.write(decoder.decode(socket.readAll().data()))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    sys.stdout.write(decoder.decode(b"", final=True))
+    return 0
@@ -0,0 +1,116 @@
+﻿import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .models import CommandDefinition
+
+
+@dataclass(frozen=True)
+class RunResult:
+    exit_code: int
+    timed_out: bool
+    output: str
+    queue_wait: float
+    duration: float
+
+
+@dataclass
+class RunRequest:
+    command: CommandDefinition
+    command_str: str
+    values: Dict[str, str]
+    priority: int
+    sequence: int
+    enqueued_at: float
+    requesters: List[str] = field(default_factory=list)
+    callbacks: List[Callable[[RunResult], None]] = field(default_factory=list)
+    started_at: Optional[float] = None
+    cancelled: bool = False
+    timeout: Optional[float] = None
+    timeout_reason: str = ""
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.command.kind, self.command_str
+
+    @property
+    def queue_wait(self) -> float:
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+    def resolve(self, exit_code: int, timed_out: bool, output: str) -> RunResult:
+        duration = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+        return RunResult(exit_code, timed_out, output, self.queue_wait, duration)
+
+    def deliver(self, result: RunResult) -> None:
+        # Every coalesced requester gets the one shared result.
+        for callback in self.callbacks:
+            callback(result)
+
+
+class RunQueue:
+    def __init__(self) -> None:
+        self._heap: List[Tuple[int, int, RunRequest]] = []
+        self._pending: Dict[Tuple[str, str], RunRequest] = {}
+        self._by_sequence: Dict[int, RunRequest] = {}
+        self._counter = itertools.count(1)
+
+    def enqueue(
+        self,
+        command: CommandDefinition,
+        command_str: str,
+        values: Dict[str, str],
+        requester: str,
+        on_result: Optional[Callable[[RunResult], None]] = None,
+    ) -> Tuple[RunRequest, bool]:
+        key = (command.kind, command_str)
+        request = self._pending.get(key)
+        coalesced = request is not None
+        if request is None:
+            request = RunRequest(
+                command=command,
+                command_str=command_str,
+                values=dict(values),
+                priority=command.priority,
+                sequence=next(self._counter),
+                enqueued_at=time.monotonic(),
+            )
+            self._pending[key] = request
+            self._by_sequence[request.sequence] = request
+            heapq.heappush(self._heap, (-request.priority, request.sequence, request))
+        request.requesters.append(requester)
+        if on_result is not None:
+            request.callbacks.append(on_result)
+        return request, coalesced
+
+    def pop(self) -> Optional[RunRequest]:
+        while self._heap:
+            _priority, _sequence, request = heapq.heappop(self._heap)
+            if request.cancelled:
+                continue
+            self._forget(request)
+            request.started_at = time.monotonic()
+            return request
+        return None
+
+    def cancel(self, sequence: int) -> Optional[RunRequest]:
+        request = self._by_sequence.get(sequence)
+        if request is None:
+            return None
+        request.cancelled = True
+        self._forget(request)
+        return request
+
+    def pending(self) -> List[RunRequest]:
+        live = [entry for entry in self._heap if not entry[2].cancelled]
+        return [request for _priority, _sequence, request in sorted(live, key=lambda e: e[:2])]
+
+    def __len__(self) -> int:
+        return len(self._by_sequence)
+
+    def _forget(self, request: RunRequest) -> None:
+        self._by_sequence.pop(request.sequence, None)
+        if self._pending.get(request.key) is request:
+            del self._pending[request.key]
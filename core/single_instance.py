@@ -0,0 +1,90 @@
+import getpass
+import json
+from typing import Dict, Optional
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+CONNECT_TIMEOUT_MS = 300
+
+
+def server_name() -> str:
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "default"
+    return f"CmdLauncher-{user}"
+
+
+def send_request(request: Dict, timeout_ms: int = CONNECT_TIMEOUT_MS) -> bool:
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    socket.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+    socket.waitForBytesWritten(timeout_ms)
+    socket.disconnectFromServer()
+    if socket.state() != QLocalSocket.UnconnectedState:
+        socket.waitForDisconnected(timeout_ms)
+    return True
+
+
+def listen_exclusive(server: QLocalServer, name: str, timeout_ms: int = CONNECT_TIMEOUT_MS) -> bool:
+    # Probe first: with access options set, Qt on Unix replaces an existing
+    # socket file on listen(), which would hijack a live instance.
+    probe = QLocalSocket()
+    probe.connectToServer(name)
+    if probe.waitForConnected(timeout_ms):
+        probe.abort()
+        return False
+    if server.listen(name):
+        return True
+    # Nobody answered, so the socket is stale (left by a crashed instance).
+    QLocalServer.removeServer(name)
+    return server.listen(name)
+
+
+class SingleInstanceServer(QObject):
+    request_received = Signal(dict)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._buffers: Dict[QLocalSocket, bytes] = {}
+
+    def listen(self) -> bool:
+        return listen_exclusive(self._server, server_name())
+
+    def close(self) -> None:
+        if self._server.isListening():
+            self._server.close()
+
+    def _on_new_connection(self) -> None:
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _read(self, socket: QLocalSocket) -> None:
+        buffer = self._buffers.get(socket, b"") + socket.readAll().data()
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            self._dispatch(line)
+        self._buffers[socket] = buffer
+
+    def _on_disconnected(self, socket: QLocalSocket) -> None:
+        buffer = self._buffers.pop(socket, b"") + socket.readAll().data()
+        if buffer.strip():
+            self._dispatch(buffer)
+        socket.deleteLater()
+
+    def _dispatch(self, line: bytes) -> None:
+        try:
+            request = json.loads(line.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            return
+        if isinstance(request, dict):
+            self.request_received.emit(request)
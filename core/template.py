@@ -0,0 +1,132 @@
+﻿import os
+import re
+from string import Formatter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+ENV_VAR = re.compile(r"%([A-Za-z0-9_]+)%")
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+CMD_SPECIAL = set(' \t&|<>^(),;="')
+POWERSHELL_BARE = re.compile(r"^[A-Za-z0-9_.:/\\-]+$")
+
+BACKENDS = ("cmd", "powershell", "none")
+
+
+class _Segment(NamedTuple):
+    kind: str  # "text", "env" or "param"
+    value: str
+    quote: str  # quote character open at this position, "" when unquoted
+    conversion: Optional[str] = None
+    format_spec: str = ""
+
+
+def template_backend(kind: str, admin: bool) -> str:
+    if kind in ("group", "handler", "workflow"):
+        return "none"
+    return "powershell" if admin else "cmd"
+
+
+def _escape_cmd_percent(value: str, quoted: bool) -> str:
+    # cmd.exe expands %VAR% in the whole command line, quotes included. A caret
+    # only escapes outside quotes, so inside them the quote is closed around it.
+    return value.replace("%", '"^%"' if quoted else "^%")
+
+
+def quote_value(value: str, backend: str, quote: str) -> str:
+    if backend == "cmd":
+        # cmd.exe has no escape inside double quotes, so a stray quote is dropped
+        # rather than allowed to close the string early.
+        value = value.replace('"', "")
+        if quote:
+            return _escape_cmd_percent(value, quoted=True)
+        if value and not any(char in CMD_SPECIAL for char in value):
+            return _escape_cmd_percent(value, quoted=False)
+        return f'"{_escape_cmd_percent(value, quoted=True)}"'
+    if backend == "powershell":
+        if quote == "'":
+            return value.replace("'", "''")
+        if quote == '"':
+            return re.sub(r'([`"$])', r"`\1", value)
+        if value and POWERSHELL_BARE.match(value):
+            return value
+        return "'" + value.replace("'", "''") + "'"
+    return value
+
+
+class CompiledTemplate:
+    def __init__(
+        self,
+        source: str,
+        segments: Tuple[_Segment, ...],
+        defaults: Dict[str, str],
+        backend: str,
+    ) -> None:
+        self.source = source
+        self.backend = backend
+        self._segments = segments
+        self._defaults = defaults
+
+    @classmethod
+    def compile(cls, template: str, params: Sequence, backend: str, owner: str = "") -> "CompiledTemplate":
+        if backend not in BACKENDS:
+            raise ValueError(f"{owner}: unknown template backend {backend!r}")
+        declared = {param.param_id: param for param in params}
+        prefix = f"{owner}: " if owner else ""
+
+        try:
+            parsed = list(Formatter().parse(template))
+        except ValueError as exc:
+            raise ValueError(f"{prefix}invalid template {template!r}: {exc}") from exc
+
+        segments: List[_Segment] = []
+        quote = ""
+        for literal, field_name, format_spec, conversion in parsed:
+            if literal:
+                position = 0
+                for match in ENV_VAR.finditer(literal):
+                    if match.start() > position:
+                        segments.append(_Segment("text", literal[position : match.start()], quote))
+                    segments.append(_Segment("env", match.group(1), quote))
+                    position = match.end()
+                if position < len(literal):
+                    segments.append(_Segment("text", literal[position:], quote))
+                quote = cls._track_quotes(literal, quote, backend)
+            if field_name is None:
+                continue
+            if not IDENTIFIER.match(field_name):
+                raise ValueError(f"{prefix}unsupported placeholder {{{field_name}}}")
+            if field_name not in declared:
+                raise ValueError(f"{prefix}template references undeclared parameter {{{field_name}}}")
+            segments.append(_Segment("param", field_name, quote, conversion, format_spec or ""))
+
+        defaults = {
+            param.param_id: str(param.default) for param in params if param.default is not None
+        }
+        return cls(template, tuple(segments), defaults, backend)
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts: List[str] = []
+        for segment in self._segments:
+            if segment.kind == "text":
+                parts.append(segment.value)
+            elif segment.kind == "env":
+                parts.append(os.environ.get(segment.value, f"%{segment.value}%"))
+            else:
+                value = values.get(segment.value) or self._defaults.get(segment.value, "")
+                if segment.conversion or segment.format_spec:
+                    formatter = Formatter()
+                    value = formatter.format_field(
+                        formatter.convert_field(value, segment.conversion), segment.format_spec
+                    )
+                parts.append(quote_value(str(value), self.backend, segment.quote))
+        return "".join(parts)
+
+    @staticmethod
+    def _track_quotes(literal: str, quote: str, backend: str) -> str:
+        quote_chars = "\"'" if backend == "powershell" else '"'
+        for char in literal:
+            if quote:
+                if char == quote:
+                    quote = ""
+            elif char in quote_chars:
+                quote = char
+        return quote
@@ -0,0 +1,159 @@
+﻿import json
+import os
+from bisect import insort
+from typing import Dict, List, Optional, Tuple
+
+from .models import CommandDefinition
+from .run_queue import RunResult
+
+QUANTILE = 0.95
+
+
+class P2Quantile:
+    # Streaming quantile estimate (Jain & Chlamtac P-square): five markers,
+    # constant memory, no stored samples.
+    def __init__(self, quantile: float = QUANTILE) -> None:
+        self.quantile = quantile
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self._increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        heights = self._heights
+        if len(heights) < 5:
+            insort(heights, value)
+            return
+
+        positions = self._positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            delta = self._desired[i] - positions[i]
+            if (delta >= 1 and positions[i + 1] - positions[i] > 1) or (
+                delta <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if delta > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def value(self) -> Optional[float]:
+        if not self._heights:
+            return None
+        if len(self._heights) < 5:
+            index = min(len(self._heights) - 1, round(self.quantile * (len(self._heights) - 1)))
+            return self._heights[index]
+        return self._heights[2]
+
+    def to_dict(self) -> Dict:
+        return {
+            "quantile": self.quantile,
+            "count": self.count,
+            "heights": self._heights,
+            "positions": self._positions,
+            "desired": self._desired,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "P2Quantile":
+        sketch = cls(float(data.get("quantile", QUANTILE)))
+        sketch.count = int(data.get("count", 0))
+        sketch._heights = [float(value) for value in data.get("heights", [])]
+        if len(sketch._heights) == 5:
+            sketch._positions = [int(value) for value in data["positions"]]
+            sketch._desired = [float(value) for value in data["desired"]]
+        return sketch
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+
+class TimeoutPolicy:
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._sketches: Dict[str, P2Quantile] = self._load()
+
+    def resolve(self, command: CommandDefinition) -> Tuple[float, str]:
+        adaptive = command.adaptive_timeout
+        if adaptive is None:
+            return float(command.timeout), "fixed"
+
+        sketch = self._sketches.get(command.command_id)
+        count = sketch.count if sketch else 0
+        if sketch is None or count < adaptive.min_samples:
+            reason = f"adaptive warming up ({count}/{adaptive.min_samples} runs), using fixed value"
+            return float(command.timeout), reason
+
+        p95 = sketch.value() or 0.0
+        raw = p95 * adaptive.factor
+        effective = min(max(raw, adaptive.floor), adaptive.ceiling)
+        reason = (
+            f"adaptive: {adaptive.factor:g} x p95 {p95:.2f}s over {count} runs = {raw:.1f}s, "
+            f"clamped to [{adaptive.floor:g}, {adaptive.ceiling:g}]"
+        )
+        return effective, reason
+
+    def record(self, command: CommandDefinition, result: RunResult, timeout: Optional[float] = None) -> None:
+        # Runs that failed to start (exit code -1) say nothing about duration.
+        if command.adaptive_timeout is None or (result.exit_code == -1 and not result.timed_out):
+            return
+        duration = result.duration
+        if result.timed_out:
+            # Censored sample: the run took at least the limit it was killed at.
+            # Keeping it lets p95 climb to the limit so the next timeout grows
+            # by the factor instead of staying pinned below slow runs.
+            duration = max(duration, timeout or 0.0)
+        sketch = self._sketches.setdefault(command.command_id, P2Quantile())
+        sketch.add(duration)
+        self._save()
+
+    def _load(self) -> Dict[str, P2Quantile]:
+        try:
+            with open(self._path, "r", encoding="utf-8") as handle:
+                raw = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        sketches: Dict[str, P2Quantile] = {}
+        for command_id, data in raw.items():
+            try:
+                sketches[command_id] = P2Quantile.from_dict(data)
+            except (KeyError, TypeError, ValueError):
+                continue
+        return sketches
+
+    def _save(self) -> None:
+        data = {command_id: sketch.to_dict() for command_id, sketch in self._sketches.items()}
+        temp_path = f"{self._path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(temp_path, self._path)
+        except OSError:
+            pass
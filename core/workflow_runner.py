@@ -0,0 +1,257 @@
+﻿import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from .command_builder import (
+    CAPTURE_REF,
+    build_command_string,
+    resolve_param_values,
+    start_command,
+    validate_param_values,
+)
+from .command_runner import CommandRunner
+from .handler_runner import HandlerRunner
+from .models import CommandDefinition, WorkflowNode
+
+
+class _NodeState:
+    def __init__(self, node: WorkflowNode, command: CommandDefinition) -> None:
+        self.node = node
+        self.command = command
+        self.status = "pending"
+        self.runner: Optional[QObject] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.exit_code: Optional[int] = None
+        self.captures: Dict[str, str] = {}
+        self.buffer = ""
+
+
+class WorkflowRunner(QObject):
+    output_received = Signal(str)
+    started = Signal(str)
+    finished = Signal(int, bool, str)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+        self._resolve: Callable[[str], Optional[CommandDefinition]] = lambda _command_id: None
+        self._states: Dict[str, _NodeState] = {}
+        self._workflow: Optional[CommandDefinition] = None
+        self._chunks: List[str] = []
+        self._running = False
+        self._stopping = False
+        self._timed_out = False
+        self._command_str = ""
+        self._started_at = 0.0
+        self._encoding_override: Optional[str] = None
+        self._cmd_prefix = ""
+        self._use_cmd_unicode = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def command_str(self) -> str:
+        return self._command_str
+
+    def set_resolver(self, resolve: Callable[[str], Optional[CommandDefinition]]) -> None:
+        self._resolve = resolve
+
+    def set_output_encoding(self, encoding: Optional[str]) -> None:
+        self._encoding_override = encoding
+
+    def set_cmd_prefix(self, prefix: str) -> None:
+        self._cmd_prefix = prefix
+
+    def set_cmd_unicode(self, enabled: bool) -> None:
+        self._use_cmd_unicode = enabled
+
+    def start(
+        self,
+        command: CommandDefinition,
+        _values: Dict[str, str],
+        display: str,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        if self._running:
+            return False
+
+        self._workflow = command
+        self._states = {
+            node.node_id: _NodeState(node, self._resolve(node.command_id)) for node in command.nodes
+        }
+        self._chunks = []
+        self._command_str = display
+        self._stopping = False
+        self._timed_out = False
+        self._running = True
+        self._started_at = time.monotonic()
+        self.started.emit(command.label)
+
+        seconds = command.timeout if timeout is None else timeout
+        if seconds > 0:
+            self._timer.start(int(seconds * 1000))
+
+        self._schedule()
+        return True
+
+    def stop(self) -> None:
+        self._stopping = True
+        for state in self._states.values():
+            if state.status == "running" and state.runner is not None:
+                state.runner.stop()
+
+    def _emit(self, text: str) -> None:
+        self._chunks.append(text)
+        self.output_received.emit(text)
+
+    def _schedule(self) -> None:
+        if not self._running:
+            return
+
+        changed = True
+        while changed:
+            changed = False
+            for state in self._states.values():
+                if state.status != "pending":
+                    continue
+                if self._stopping:
+                    state.status = "cancelled"
+                    changed = True
+                    continue
+                depends = [self._states[node_id] for node_id in state.node.depends]
+                if any(dep.status in ("failed", "skipped", "cancelled") for dep in depends):
+                    state.status = "skipped"
+                    self._emit(f"[{state.node.node_id}] SKIPPED（依赖未成功）\n")
+                    changed = True
+                elif all(dep.status == "ok" for dep in depends):
+                    self._start_node(state)
+                    changed = True
+
+        if not any(state.status == "running" for state in self._states.values()):
+            self._finish()
+
+    def _start_node(self, state: _NodeState) -> None:
+        node = state.node
+        command = state.command
+        state.status = "running"
+        state.started_at = time.monotonic()
+
+        try:
+            values = {key: self._substitute_captures(value) for key, value in node.params.items()}
+            resolved = resolve_param_values(command.params, values)
+        except KeyError as exc:
+            self._fail_node(state, f"缺少参数或上游输出 {exc}")
+            return
+        errors = validate_param_values(command.params, resolved)
+        if errors:
+            self._fail_node(state, f"参数错误：{' '.join(errors)}")
+            return
+        command_str = build_command_string(command, resolved)
+
+        if command.kind == "handler":
+            runner = HandlerRunner(self)
+        else:
+            runner = CommandRunner(self)
+            runner.set_output_encoding(self._encoding_override)
+            runner.set_cmd_prefix(self._cmd_prefix)
+            runner.set_cmd_unicode(self._use_cmd_unicode)
+        runner.output_received.connect(lambda text, s=state: self._on_node_output(s, text))
+        # Queued so a runner that fails inside start() cannot re-enter _schedule.
+        runner.finished.connect(
+            lambda code, timed_out, output, s=state: self._on_node_finished(s, code, timed_out, output),
+            Qt.QueuedConnection,
+        )
+        state.runner = runner
+
+        self._emit(f"[{node.node_id}] RUN {command.label}: {command_str}\n")
+        if not start_command(runner, command, command_str, resolved):
+            self._fail_node(state, "无法启动")
+
+    def _substitute_captures(self, value: str) -> str:
+        def replace(match: re.Match) -> str:
+            state = self._states.get(match.group(1))
+            if state is None or match.group(2) not in state.captures:
+                raise KeyError(match.group(0))
+            return state.captures[match.group(2)]
+
+        return CAPTURE_REF.sub(replace, value)
+
+    def _fail_node(self, state: _NodeState, reason: str) -> None:
+        state.status = "failed"
+        state.finished_at = time.monotonic()
+        self._emit(f"[{state.node.node_id}] FAILED {reason}\n")
+        if state.runner is not None:
+            state.runner.deleteLater()
+            state.runner = None
+        if self._workflow and self._workflow.policy == "fail_fast":
+            self.stop()
+
+    def _on_node_output(self, state: _NodeState, text: str) -> None:
+        lines = (state.buffer + text).split("\n")
+        state.buffer = lines.pop()
+        if lines:
+            prefix = f"[{state.node.node_id}] "
+            self._emit("".join(f"{prefix}{line}\n" for line in lines))
+
+    def _on_node_finished(self, state: _NodeState, exit_code: int, timed_out: bool, output: str) -> None:
+        if state.status != "running":
+            return
+        if state.buffer:
+            self._on_node_output(state, "\n")
+        state.finished_at = time.monotonic()
+        state.exit_code = exit_code
+        for name, pattern in state.node.capture.items():
+            match = re.search(pattern, output, re.MULTILINE)
+            if match:
+                state.captures[name] = (match.group(1) if match.groups() else match.group(0)).strip()
+
+        status = "TIMEOUT" if timed_out else f"exit_code={exit_code}"
+        elapsed = state.finished_at - (state.started_at or state.finished_at)
+        self._emit(f"[{state.node.node_id}] DONE {status}（{elapsed:.1f}s）\n")
+        if state.runner is not None:
+            state.runner.deleteLater()
+            state.runner = None
+
+        if exit_code == 0 and not timed_out:
+            state.status = "ok"
+        elif self._stopping:
+            state.status = "cancelled"
+        else:
+            state.status = "failed"
+            if self._workflow and self._workflow.policy == "fail_fast":
+                self.stop()
+        self._schedule()
+
+    def _on_timeout(self) -> None:
+        if self._running:
+            self._timed_out = True
+            self.stop()
+            self._schedule()
+
+    def _finish(self) -> None:
+        self._timer.stop()
+        self._running = False
+        finished_at = time.monotonic()
+
+        lines = ["\n工作流耗时："]
+        for state in self._states.values():
+            if state.started_at is None:
+                lines.append(f"  {state.node.node_id:<16} {state.status:<9} -")
+                continue
+            offset = state.started_at - self._started_at
+            elapsed = (state.finished_at or finished_at) - state.started_at
+            lines.append(
+                f"  {state.node.node_id:<16} {state.status:<9} 开始 +{offset:.1f}s  耗时 {elapsed:.1f}s"
+            )
+        lines.append(f"  总耗时 {finished_at - self._started_at:.1f}s\n")
+        self._emit("\n".join(lines) + "\n")
+
+        succeeded = all(state.status == "ok" for state in self._states.values())
+        self.finished.emit(0 if succeeded else 1, self._timed_out, "".join(self._chunks))
@@ -0,0 +1,71 @@
+"""Stand-in for cmd.exe and the Windows tools CmdLauncher calls.
+
+Invoked as ``fake_system.py <name> [args...]``. As ``cmd`` it unpacks the
+``/c`` command line the runner builds and replays the recording for the first
+program in it; under any other name it replays ``recordings/<name>.txt``.
+
+Environment knobs (all optional):
+
+- SOAK_ENCODINGS: comma-separated encodings picked at random per run
+  (default ``utf-8,gbk,utf-16-le``)
+- SOAK_OUTPUT_BYTES: repeat the recording until at least this many bytes
+- SOAK_CHUNK_BYTES / SOAK_CHUNK_DELAY: write in chunks with a pause between
+- SOAK_EXIT_CODE: exit code to return
+"""
+
+import os
+import random
+import sys
+import time
+
+RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+CHCP_PREFIX = "chcp 65001 > nul & "
+
+
+def _program_from_cmd(args: list) -> str:
+    while args and args[0].lower() in ("/u", "/c"):
+        args = args[1:]
+    line = " ".join(args).strip()
+    if line.lower().startswith(CHCP_PREFIX):
+        line = line[len(CHCP_PREFIX) :]
+    first = line.split(" ", 1)[0] if line else ""
+    return first.strip('"').lower()
+
+
+def _load_recording(name: str) -> str:
+    name = os.path.splitext(os.path.basename(name))[0]
+    path = os.path.join(RECORDINGS, f"{name}.txt")
+    if not os.path.exists(path):
+        return f"'{name}' 不是内部或外部命令，也不是可运行的程序\n或批处理文件。\n"
+    with open(path, "r", encoding="utf-8") as handle:
+        return handle.read()
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        return 2
+    name = sys.argv[1].lower()
+    if name == "cmd":
+        name = _program_from_cmd(sys.argv[2:])
+
+    text = _load_recording(name).replace("\n", "\r\n")
+    encodings = os.environ.get("SOAK_ENCODINGS", "utf-8,gbk,utf-16-le").split(",")
+    data = text.encode(random.choice(encodings).strip(), errors="replace")
+
+    target = int(os.environ.get("SOAK_OUTPUT_BYTES", "0"))
+    if target > len(data):
+        data = data * (target // len(data) + 1)
+
+    chunk = int(os.environ.get("SOAK_CHUNK_BYTES", "0")) or len(data)
+    delay = float(os.environ.get("SOAK_CHUNK_DELAY", "0"))
+    out = sys.stdout.buffer
+    for offset in range(0, len(data), chunk):
+        out.write(data[offset : offset + chunk])
+        out.flush()
+        if delay:
+            time.sleep(delay)
+    return int(os.environ.get("SOAK_EXIT_CODE", "0"))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+"""Offscreen soak test for CmdLauncher.
+
+Drives thousands of runs through MainWindow with cmd.exe and the Windows tools
+replaced by ``fake_system.py``, sampling memory, open file handles, live
+QProcess objects and QTimers as it goes. Exits non-zero if any of them grows on
+every sample after warm-up by more than a noise tolerance.
+
+    python tools/soak/soak.py --runs 2000 --output-bytes 65536 --chunk-bytes 4096
+
+POSIX only (the fakes are installed as shell launchers on PATH).
+"""
+
+import argparse
+import gc
+import os
+import shlex
+import shutil
+import stat
+import sys
+import tempfile
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+FAKE_SYSTEM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_system.py")
+FAKE_PROGRAMS = ("cmd", "ipconfig", "netsh", "getmac", "powercfg", "ping", "powershell")
+FAKE_PARAMS = {"wifi_name": "家里的WiFi"}
+# Growth below these totals is allocator / interpreter noise, not a leak.
+GROWTH_TOLERANCE = {"rss_kb": 4096, "fds": 0, "qprocess": 0, "qtimer": 0, "py_objects": 500}
+
+
+def build_bin_dir(directory: str) -> str:
+    for name in FAKE_PROGRAMS:
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(
+                "#!/bin/sh\n"
+                f"exec {shlex.quote(sys.executable)} {shlex.quote(FAKE_SYSTEM)} {name} \"$@\"\n"
+            )
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return os.path.join(directory, "cmd")
+
+
+def read_rss_kb() -> int:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def count_open_fds() -> int:
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return 0
+
+
+def grows_monotonically(values: List[int], tolerance: int = 0) -> bool:
+    return (
+        len(values) >= 3
+        and all(later > earlier for earlier, later in zip(values, values[1:]))
+        and values[-1] - values[0] > tolerance
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--warmup-samples", type=int, default=2)
+    parser.add_argument("--pending", type=int, default=4, help="queued requests kept in flight")
+    parser.add_argument("--output-bytes", type=int, default=0)
+    parser.add_argument("--chunk-bytes", type=int, default=0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--encodings", default="utf-8,gbk,utf-16-le")
+    parser.add_argument(
+        "--rss-tolerance-kb",
+        type=int,
+        default=GROWTH_TOLERANCE["rss_kb"],
+        help="total RSS growth after warm-up still treated as noise",
+    )
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="cmdlauncher-soak-")
+    bin_dir = os.path.join(work_dir, "bin")
+    os.makedirs(bin_dir)
+    os.environ["ComSpec"] = build_bin_dir(bin_dir)
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+    os.environ["SOAK_ENCODINGS"] = args.encodings
+    os.environ["SOAK_OUTPUT_BYTES"] = str(args.output_bytes)
+    os.environ["SOAK_CHUNK_BYTES"] = str(args.chunk_bytes)
+    os.environ["SOAK_CHUNK_DELAY"] = str(args.chunk_delay)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    sys.path.insert(0, ROOT)
+    from PySide6.QtCore import QProcess, QTimer
+    from PySide6.QtWidgets import QApplication
+
+    from core.config_loader import CommandCatalog
+    from core.logger import AppLogger
+    from ui.main_window import MainWindow
+
+    app = QApplication([])
+    catalog = CommandCatalog(ROOT)
+    window = MainWindow(catalog, AppLogger(work_dir), ROOT)
+
+    requests = []
+    for command in catalog.all_commands():
+        program = command.template.split(" ", 1)[0].lower()
+        if command.kind != "command" or command.admin or program not in FAKE_PROGRAMS:
+            continue
+        params = {param.param_id: str(param.default) for param in command.params if param.default is not None}
+        params.update({key: value for key, value in FAKE_PARAMS.items() if key in command.template})
+        requests.append({"action": "run", "command_id": command.command_id, "params": params})
+    if not requests:
+        print("no commands can be replayed by the fakes")
+        return 2
+
+    samples: List[Dict[str, int]] = []
+    state = {"submitted": 0, "finished": 0}
+
+    def take_sample() -> None:
+        window._clear_output()
+        gc.collect()
+        app.processEvents()
+        samples.append(
+            {
+                "runs": state["finished"],
+                "rss_kb": read_rss_kb(),
+                "fds": count_open_fds(),
+                "qprocess": len(window.findChildren(QProcess)),
+                "qtimer": len(window.findChildren(QTimer)),
+                "py_objects": len(gc.get_objects()),
+            }
+        )
+        row = samples[-1]
+        print("  ".join(f"{key}={value}" for key, value in row.items()), flush=True)
+
+    def top_up() -> None:
+        while state["submitted"] < args.runs and len(window._queue) < args.pending:
+            request = requests[state["submitted"] % len(requests)]
+            state["submitted"] += 1
+            window.handle_request(request)
+
+    def on_finished(*_args) -> None:
+        state["finished"] += 1
+        if state["finished"] % args.sample_every == 0:
+            take_sample()
+        if state["finished"] >= args.runs or (
+            state["submitted"] >= args.runs and not len(window._queue) and not window._active_runner.is_running
+        ):
+            QTimer.singleShot(0, app.quit)
+            return
+        QTimer.singleShot(0, top_up)
+
+    window._runner.finished.connect(on_finished)
+    take_sample()
+    QTimer.singleShot(0, top_up)
+    app.exec()
+
+    leaks = []
+    tail = samples[1 + args.warmup_samples :]
+    tolerance = dict(GROWTH_TOLERANCE, rss_kb=args.rss_tolerance_kb)
+    for key in ("rss_kb", "fds", "qprocess", "qtimer", "py_objects"):
+        if grows_monotonically([sample[key] for sample in tail], tolerance[key]):
+            leaks.append(key)
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"finished {state['finished']} runs, {len(samples)} samples")
+    if leaks:
+        print(f"FAIL: monotonic growth in {', '.join(leaks)}")
+        return 1
+    print("OK: no monotonic growth")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,10 +4,10 @@ import os
 import re
 import subprocess
 import sys
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set
 
-from PySide6.QtCore import Qt, QProcess
-from PySide6.QtGui import QAction, QActionGroup, QColor, QFont, QIcon, QTextCursor
+from PySide6.QtCore import Qt, QProcess, QUrl
+from PySide6.QtGui import QAction, QActionGroup, QColor, QDesktopServices, QFont, QIcon
 from PySide6.QtWidgets import (
     QApplication,
     QDialog,
@@ -16,10 +16,11 @@ from PySide6.QtWidgets import (
     QLabel,
     QGridLayout,
     QHBoxLayout,
+    QListWidget,
+    QListWidgetItem,
     QMainWindow,
     QMenu,
     QMessageBox,
-    QPlainTextEdit,
     QPushButton,
     QStatusBar,
     QSystemTrayIcon,
@@ -28,24 +29,54 @@ from PySide6.QtWidgets import (
     QStyle,
 )
 
+from core.command_builder import (
+    build_command_string,
+    resolve_param_values,
+    start_command,
+    validate_param_values,
+)
 from core.command_runner import CommandRunner
+from core.config_loader import CommandCatalog
+from core.handler_runner import HandlerRunner
 from core.logger import AppLogger
-from core.models import CommandDefinition, ParamDefinition
+from core.models import CommandDefinition
+from core.output_sinks import FileTeeSink, LocalSocketSink, OutputSinks, RingBufferSink
+from core.run_queue import RunQueue, RunRequest, RunResult
+from core.single_instance import SingleInstanceServer
+from core.timeout_policy import TimeoutPolicy
+from core.workflow_runner import WorkflowRunner
+from ui.output_view import OutputView
 from ui.param_dialog import ParamDialog
 from ui.wifi_select_dialog import WifiSelectDialog
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, commands: List[CommandDefinition], logger: AppLogger, app_root: str) -> None:
+    def __init__(
+        self,
+        catalog: CommandCatalog,
+        logger: AppLogger,
+        app_root: str,
+        instance: Optional[SingleInstanceServer] = None,
+    ) -> None:
         super().__init__()
-        self._commands = commands
+        self._catalog = catalog
         self._logger = logger
         self._app_root = app_root
-        self._command_map: Dict[str, CommandDefinition] = {}
-        self._current_command: Optional[CommandDefinition] = None
+        self._instance = instance
+        self._populated_groups: Set[str] = set()
+        self._current_request: Optional[RunRequest] = None
+        self._queue = RunQueue()
+        self._timeout_policy = TimeoutPolicy(os.path.join(os.path.dirname(logger.path), "durations.json"))
+        self._ring_buffer = RingBufferSink()
+        self._sinks = OutputSinks(
+            [
+                FileTeeSink(os.path.join(os.path.dirname(logger.path), "runs")),
+                self._ring_buffer,
+                LocalSocketSink(self._ring_buffer, self),
+            ]
+        )
         self._allow_close = False
         self._command_buttons: List[QPushButton] = []
-        self._last_wifi_name: Optional[str] = None
 
         self.setWindowTitle("CMD不用记   B站：噜啦噜啦萝卜")
         self.setWindowIcon(QIcon(f"{self._app_root}/assets/command.ico"))
@@ -61,8 +92,20 @@ class MainWindow(QMainWindow):
         self._command_layout = QGridLayout()
         self._command_column.setLayout(self._command_layout)
 
-        self._output = QPlainTextEdit(self)
-        self._output.setReadOnly(True)
+        self._output_column = QWidget(self)
+        output_layout = QVBoxLayout(self._output_column)
+        output_layout.setContentsMargins(0, 0, 0, 0)
+
+        self._output = OutputView(self)
+
+        self._queue_label = QLabel("排队中：0", self)
+        self._queue_list = QListWidget(self)
+        self._queue_list.setMaximumHeight(110)
+        self._queue_list.setSelectionMode(QListWidget.ExtendedSelection)
+
+        output_layout.addWidget(self._output, 1)
+        output_layout.addWidget(self._queue_label)
+        output_layout.addWidget(self._queue_list)
 
         self._bottom_bar = QWidget(self)
         self._bottom_layout = QHBoxLayout()
@@ -70,11 +113,14 @@ class MainWindow(QMainWindow):
 
         self._clear_button = QPushButton("清空输出", self)
         self._clear_button.clicked.connect(self._clear_output)
+        self._cancel_queued_button = QPushButton("取消排队", self)
+        self._cancel_queued_button.clicked.connect(self._cancel_selected_requests)
         self._bottom_layout.addStretch(1)
+        self._bottom_layout.addWidget(self._cancel_queued_button)
         self._bottom_layout.addWidget(self._clear_button)
 
         content_layout.addWidget(self._command_column, 3)
-        content_layout.addWidget(self._output, 4)
+        content_layout.addWidget(self._output_column, 4)
 
         layout.addWidget(content, 1)
         layout.addWidget(self._bottom_bar)
@@ -90,10 +136,29 @@ class MainWindow(QMainWindow):
         self._runner.started.connect(self._on_started)
         self._runner.finished.connect(self._on_finished)
 
+        self._handler_runner = HandlerRunner(self)
+        self._handler_runner.output_received.connect(self._on_output)
+        self._handler_runner.started.connect(self._on_started)
+        self._handler_runner.finished.connect(self._on_finished)
+
+        self._workflow_runner = WorkflowRunner(self)
+        self._workflow_runner.set_resolver(lambda command_id: self._catalog.find(command_id))
+        self._workflow_runner.output_received.connect(self._on_output)
+        self._workflow_runner.started.connect(self._on_started)
+        self._workflow_runner.finished.connect(self._on_finished)
+        self._active_runner = self._runner
+
         self._build_buttons()
         self._build_tray()
 
     def _build_buttons(self) -> None:
+        while self._command_layout.count():
+            item = self._command_layout.takeAt(0)
+            if item.widget() is not None:
+                item.widget().deleteLater()
+        self._populated_groups.clear()
+        self._command_buttons = []
+
         header_cmd = QLabel("Cmd 命令", self)
         header_desc = QLabel("命令说明", self)
         header_cmd.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
@@ -108,28 +173,85 @@ class MainWindow(QMainWindow):
         row = 1
         group_colors = ["#f2f6ff", "#f2fff5", "#fff6f2"]
         group_index = 0
-        current_group_color = group_colors[group_index]
-        for command in self._commands:
-            if command.kind == "group":
-                line = QFrame(self)
-                line.setFrameShape(QFrame.HLine)
-                line.setFrameShadow(QFrame.Sunken)
-                self._command_layout.addWidget(line, row, 0, 1, 2)
-                row += 1
-                header = QLabel(command.label, self)
-                header.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-                current_group_color = group_colors[group_index]
-                header.setStyleSheet(f"background-color: {current_group_color}; padding: 4px 6px;")
-                group_font = header.font()
-                group_font.setBold(True)
-                header.setFont(group_font)
-                self._command_layout.addWidget(header, row, 0, 1, 2)
+        for group in self._catalog.groups():
+            group_color = group_colors[group_index]
+            body = QWidget(self)
+            body_layout = QGridLayout(body)
+            body_layout.setContentsMargins(0, 0, 0, 0)
+            body_layout.setColumnStretch(0, 1)
+            body_layout.setColumnStretch(1, 2)
+            body_layout.setHorizontalSpacing(12)
+            body_layout.setVerticalSpacing(6)
+
+            # Commands ahead of the first group marker have no header of their own.
+            if not group.command_id:
+                self._command_layout.addWidget(body, row, 0, 1, 2)
                 row += 1
-                group_index = (group_index + 1) % len(group_colors)
+                self._populate_group(group.command_id, body_layout, group_color)
                 continue
+
+            line = QFrame(self)
+            line.setFrameShape(QFrame.HLine)
+            line.setFrameShadow(QFrame.Sunken)
+            self._command_layout.addWidget(line, row, 0, 1, 2)
+            row += 1
+            header = QPushButton(self)
+            header.setCheckable(True)
+            header.setStyleSheet(
+                f"text-align: left; background-color: {group_color}; padding: 4px 6px; border: none;"
+            )
+            group_font = header.font()
+            group_font.setBold(True)
+            header.setFont(group_font)
+            header.toggled.connect(
+                lambda checked, g=group, h=header, b=body, c=group_color: self._toggle_group(g, h, b, c, checked)
+            )
+            self._command_layout.addWidget(header, row, 0, 1, 2)
+            self._command_layout.addWidget(body, row + 1, 0, 1, 2)
+            row += 2
+            group_index = (group_index + 1) % len(group_colors)
+
+            expanded = self._catalog.expanded_by_default(group.command_id)
+            self._set_group_header(header, group, expanded)
+            body.setVisible(False)
+            header.setChecked(expanded)
+
+        self._command_layout.setColumnStretch(0, 1)
+        self._command_layout.setColumnStretch(1, 2)
+        self._command_layout.setRowStretch(row, 1)
+        self._command_layout.setHorizontalSpacing(12)
+        self._command_layout.setVerticalSpacing(6)
+
+    def _set_group_header(self, header: QPushButton, group: CommandDefinition, expanded: bool) -> None:
+        header.setText(f"{'▼' if expanded else '▶'} {group.label}")
+
+    def _toggle_group(
+        self,
+        group: CommandDefinition,
+        header: QPushButton,
+        body: QWidget,
+        color: str,
+        expanded: bool,
+    ) -> None:
+        if expanded and group.command_id not in self._populated_groups:
+            try:
+                self._populate_group(group.command_id, body.layout(), color)
+            except ValueError as exc:
+                QMessageBox.warning(self, "CmdLauncher", f"{group.label} 配置错误：\n{exc}")
+                header.blockSignals(True)
+                header.setChecked(False)
+                header.blockSignals(False)
+                return
+        self._set_group_header(header, group, expanded)
+        body.setVisible(expanded)
+
+    def _populate_group(self, group_id: str, layout: QGridLayout, color: str) -> None:
+        commands = self._catalog.commands_for(group_id)
+        self._populated_groups.add(group_id)
+        for row, command in enumerate(commands):
             button = QPushButton(command.label, self)
             button.setStyleSheet(
-                f"text-align: left; padding: 4px 8px; background: {current_group_color}; "
+                f"text-align: left; padding: 4px 8px; background: {color}; "
                 "border: 1px solid #d6d6d6; border-radius: 6px;"
             )
             shadow = QGraphicsDropShadowEffect(self)
@@ -138,19 +260,21 @@ class MainWindow(QMainWindow):
             shadow.setColor(QColor(0, 0, 0, 40))
             button.setGraphicsEffect(shadow)
             button.clicked.connect(lambda checked=False, cmd=command: self._run_command(cmd))
-            self._command_layout.addWidget(button, row, 0)
+            layout.addWidget(button, row, 0)
             desc = QLabel(command.description or "", self)
-            desc.setStyleSheet(f"background-color: {current_group_color}; padding: 2px 6px;")
-            self._command_layout.addWidget(desc, row, 1)
-            self._command_map[command.command_id] = command
+            desc.setStyleSheet(f"background-color: {color}; padding: 2px 6px;")
+            layout.addWidget(desc, row, 1)
             self._command_buttons.append(button)
-            row += 1
 
-        self._command_layout.setColumnStretch(0, 1)
-        self._command_layout.setColumnStretch(1, 2)
-        self._command_layout.setRowStretch(row, 1)
-        self._command_layout.setHorizontalSpacing(12)
-        self._command_layout.setVerticalSpacing(6)
+    def _reload_catalog(self) -> None:
+        try:
+            catalog = CommandCatalog(self._app_root)
+        except ValueError as exc:
+            QMessageBox.critical(self, "CmdLauncher", f"配置错误，继续使用当前配置：\n{exc}")
+            return
+        self._catalog = catalog
+        self._build_buttons()
+        self._status.showMessage("配置已重新加载")
 
     def _build_tray(self) -> None:
         icon = QIcon(f"{self._app_root}/assets/command.ico")
@@ -160,10 +284,14 @@ class MainWindow(QMainWindow):
 
         menu = QMenu(self)
         show_action = menu.addAction("Show")
+        history_action = menu.addAction("历史日志")
+        reload_action = menu.addAction("重新加载配置")
         restart_action = menu.addAction("Restart")
         encoding_menu = menu.addMenu("输出编码")
         exit_action = menu.addAction("Exit")
         show_action.triggered.connect(self._show_window)
+        history_action.triggered.connect(self._open_history)
+        reload_action.triggered.connect(self._reload_catalog)
         restart_action.triggered.connect(self._restart_app)
         exit_action.triggered.connect(self._exit_app)
 
@@ -188,14 +316,37 @@ class MainWindow(QMainWindow):
         self.raise_()
         self.activateWindow()
 
+    def _open_history(self) -> None:
+        QDesktopServices.openUrl(QUrl.fromLocalFile(self._logger.path))
+
+    def handle_request(self, request: dict) -> None:
+        action = request.get("action", "show")
+        self._show_window()
+        if action == "history":
+            self._open_history()
+        elif action == "run":
+            command_id = request.get("command_id", "")
+            try:
+                command = self._catalog.find(command_id)
+            except ValueError as exc:
+                self._status.showMessage(f"Config error: {exc}")
+                return
+            if command is None:
+                self._status.showMessage(f"Unknown command: {command_id}")
+                return
+            params = request.get("params") or None
+            self._run_command(command, params, requester="ipc")
+
     def _exit_app(self) -> None:
         self._allow_close = True
+        self._sinks.close()
         self._tray.hide()
         self.close()
         QApplication.instance().quit()
 
     def _restart_app(self) -> None:
         self._allow_close = True
+        self._sinks.close()
         self._tray.hide()
         QApplication.instance().exit(1000)
 
@@ -210,11 +361,12 @@ class MainWindow(QMainWindow):
             self.hide()
             event.ignore()
 
-    def _run_command(self, command: CommandDefinition) -> None:
-        if self._runner.is_running:
-            QMessageBox.information(self, "CmdLauncher", "Command is already running.")
-            return
-
+    def _run_command(
+        self,
+        command: CommandDefinition,
+        values: Optional[Dict[str, str]] = None,
+        requester: str = "button",
+    ) -> None:
         if command.command_id == "boot_to_bios":
             reply = QMessageBox.warning(
                 self,
@@ -235,123 +387,164 @@ class MainWindow(QMainWindow):
                 QMessageBox.No,
             )
             if reply == QMessageBox.Yes:
-                self._restart_as_admin()
+                self._restart_as_admin(command)
             return
 
-        command_str = self._build_command_string(command)
-        if command_str is None:
+        resolved = self._collect_param_values(command, values)
+        if resolved is None:
             return
-        command_str = self._expand_env_vars(command_str)
-
-        self._current_command = command
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self._append_output(f"[{timestamp}] RUN {command.label}: {command_str}\n")
-        self._set_buttons_enabled(False)
-
-        if command.command_id == "clean_temp":
-            program = "powershell"
-            args = [
-                "-NoProfile",
-                "-WindowStyle",
-                "Hidden",
-                "-Command",
-                "$items = Get-ChildItem -LiteralPath $env:TEMP -Force -ErrorAction SilentlyContinue; "
-                "$count = $items.Count; "
-                "$items | Remove-Item -Force -Recurse -ErrorAction SilentlyContinue; "
-                "Write-Output \"Deleted $count items from $env:TEMP\"",
-            ]
-            started = self._runner.start_with_args(command, program, args, command_str)
-        elif command.admin:
-            program = "powershell"
-            args = ["-NoProfile", "-WindowStyle", "Hidden", "-Command", command_str]
-            started = self._runner.start_with_args(command, program, args, command_str)
-        else:
-            started = self._runner.start(command, command_str)
-        if not started:
-            self._set_buttons_enabled(True)
+        command_str = build_command_string(command, resolved)
+
+        on_result = self._notify_requester(command) if requester == "ipc" else None
+        request, coalesced = self._queue.enqueue(command, command_str, resolved, requester, on_result)
+        if coalesced:
+            self._status.showMessage(f"已合并到排队中的 {command.label}（{len(request.requesters)} 次请求）")
+        elif self._active_runner.is_running:
+            self._status.showMessage(f"已加入队列：{command.label}")
+        self._start_next()
+        self._refresh_queue_view()
+
+    def _notify_requester(self, command: CommandDefinition) -> Callable[[RunResult], None]:
+        # IPC callers have already exited, so their result goes to the tray.
+        def notify(result: RunResult) -> None:
+            status = "超时" if result.timed_out else f"退出码 {result.exit_code}"
+            icon = QSystemTrayIcon.Information if result.exit_code == 0 and not result.timed_out else QSystemTrayIcon.Warning
+            self._tray.showMessage("CmdLauncher", f"{command.label}：{status}（执行 {result.duration:.1f}s）", icon, 5000)
+
+        return notify
+
+    def _start_next(self) -> None:
+        while not self._active_runner.is_running:
+            request = self._queue.pop()
+            self._refresh_queue_view()
+            if request is None:
+                return
 
-    def _build_command_string(self, command: CommandDefinition) -> Optional[str]:
+            command = request.command
+            command_str = request.command_str
+            self._current_request = request
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            self._append_output(f"[{timestamp}] RUN {command.label}: {command_str}\n")
+            timeout, request.timeout_reason = self._timeout_policy.resolve(command)
+            request.timeout = timeout
+
+            if command.kind == "handler":
+                self._active_runner = self._handler_runner
+            elif command.kind == "workflow":
+                self._active_runner = self._workflow_runner
+            else:
+                self._active_runner = self._runner
+            self._sinks.begin(command, command_str)
+            started = start_command(self._active_runner, command, command_str, request.values, timeout)
+            if started:
+                return
+            self._sinks.end(-1, False)
+            self._current_request = None
+            request.resolve(-1, False, "")
+            self._append_output(f"[{timestamp}] FAILED {command.label}\n")
+
+    def _refresh_queue_view(self) -> None:
+        pending = self._queue.pending()
+        self._queue_list.clear()
+        for request in pending:
+            text = f"{request.command.label}: {request.command_str}"
+            if request.priority:
+                text = f"[P{request.priority}] {text}"
+            if len(request.requesters) > 1:
+                text = f"{text}  ×{len(request.requesters)}"
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, request.sequence)
+            self._queue_list.addItem(item)
+        self._queue_label.setText(f"排队中：{len(pending)}")
+
+    def _cancel_selected_requests(self) -> None:
+        for item in self._queue_list.selectedItems():
+            request = self._queue.cancel(item.data(Qt.UserRole))
+            if request is not None:
+                timestamp = datetime.now().strftime("%H:%M:%S")
+                self._append_output(f"[{timestamp}] CANCELLED {request.command.label}\n")
+        self._refresh_queue_view()
+
+    def _collect_param_values(
+        self, command: CommandDefinition, values: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, str]]:
         if command.command_id == "wifi_profile_detail":
-            wifi_name = self._select_wifi_profile()
+            wifi_name = (values or {}).get("wifi_name") or self._select_wifi_profile()
             if not wifi_name:
                 return None
-            self._last_wifi_name = wifi_name
-            return command.template.format(wifi_name=wifi_name)
+            return {"wifi_name": wifi_name}
 
         if not command.params:
-            return command.template
-
-        dialog = ParamDialog(command.label, command.params, self)
-        if dialog.exec() != QDialog.Accepted:
-            return None
+            return {}
 
-        values = dialog.values()
-        resolved = self._resolve_param_values(command.params, values)
-        try:
-            return command.template.format(**resolved)
-        except KeyError as exc:
-            QMessageBox.warning(self, "CmdLauncher", f"Missing parameter: {exc}")
+        if values is None:
+            dialog = ParamDialog(command.label, command.params, self)
+            if dialog.exec() != QDialog.Accepted:
+                return None
+            return resolve_param_values(command.params, dialog.values())
+
+        # Values passed in over IPC skip the dialog, so they get its checks here.
+        declared = {param.param_id for param in command.params}
+        errors = [f"unknown parameter {key!r}." for key in values if key not in declared]
+        resolved = resolve_param_values(command.params, values)
+        errors.extend(validate_param_values(command.params, resolved))
+        if errors:
+            self._status.showMessage(f"{command.label} 参数错误：{' '.join(errors)}")
+            self._append_output(f"{command.label} 参数错误，未执行：{' '.join(errors)}\n")
             return None
-
-    def _resolve_param_values(
-        self, params: List[ParamDefinition], values: Dict[str, str]
-    ) -> Dict[str, str]:
-        resolved: Dict[str, str] = {}
-        for param in params:
-            value = values.get(param.param_id, "")
-            if not value and param.default is not None:
-                value = str(param.default)
-            resolved[param.param_id] = value
         return resolved
 
-    def _expand_env_vars(self, command_str: str) -> str:
-        def replace(match: re.Match) -> str:
-            name = match.group(1)
-            return os.environ.get(name, match.group(0))
-
-        return re.sub(r"%([A-Za-z0-9_]+)%", replace, command_str)
-
     def _on_started(self, label: str) -> None:
         self._status.showMessage(f"Running: {label}")
 
     def _on_output(self, text: str) -> None:
         self._append_output(text)
+        self._sinks.write(text)
 
     def _on_finished(self, exit_code: int, timed_out: bool, output: str) -> None:
+        request = self._current_request
+        self._current_request = None
+        if request is None:
+            return
+        self._sinks.end(exit_code, timed_out)
+
+        command = request.command
+        result: RunResult = request.resolve(exit_code, timed_out, output)
+        self._timeout_policy.record(command, result, request.timeout)
         timestamp = datetime.now().strftime("%H:%M:%S")
         status = "TIMEOUT" if timed_out else f"exit_code={exit_code}"
-        if self._current_command and self._current_command.command_id == "wifi_profile_detail":
-            wifi_name = self._last_wifi_name or ""
+        if command.command_id == "wifi_profile_detail":
+            wifi_name = request.values.get("wifi_name", "")
             wifi_password = self._extract_wifi_password(output) or "未找到"
             self._append_output(f"\nWiFi名: {wifi_name}\nWiFi密码: {wifi_password}\n")
-        self._append_output(f"\n[{timestamp}] DONE {status}\n")
+        timing = f"排队 {result.queue_wait:.1f}s，执行 {result.duration:.1f}s"
+        if len(request.requesters) > 1:
+            timing += f"，合并 {len(request.requesters)} 次请求"
+        self._append_output(f"\n[{timestamp}] DONE {status}（{timing}）\n")
         self._status.showMessage("Done")
-        self._set_buttons_enabled(True)
-
-        if self._current_command:
-            self._logger.log_command(
-                self._current_command.command_id,
-                self._current_command.label,
-                self._runner.command_str,
-                exit_code,
-                timed_out,
-                output,
-            )
+
+        self._logger.log_command(
+            command.command_id,
+            command.label,
+            request.command_str,
+            exit_code,
+            timed_out,
+            output,
+            queue_wait=result.queue_wait,
+            duration=result.duration,
+            requesters=request.requesters,
+            timeout=request.timeout,
+            timeout_reason=request.timeout_reason,
+        )
+        request.deliver(result)
+        self._start_next()
 
     def _append_output(self, text: str) -> None:
-        cursor = self._output.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        cursor.insertText(text)
-        self._output.setTextCursor(cursor)
-        self._output.ensureCursorVisible()
+        self._output.append(text)
 
     def _clear_output(self) -> None:
         self._output.clear()
 
-    def _set_buttons_enabled(self, enabled: bool) -> None:
-        for button in self._command_buttons:
-            button.setEnabled(enabled)
-
     def _select_wifi_profile(self) -> Optional[str]:
         profiles = self._fetch_wifi_profiles()
         if not profiles:
@@ -396,14 +589,16 @@ class MainWindow(QMainWindow):
 
     def _set_output_encoding(self, mode: str) -> None:
         if mode == "utf8":
-            self._runner.set_output_encoding("utf-8")
-            self._runner.set_cmd_prefix("chcp 65001 > nul & ")
-            self._runner.set_cmd_unicode(False)
+            for runner in (self._runner, self._workflow_runner):
+                runner.set_output_encoding("utf-8")
+                runner.set_cmd_prefix("chcp 65001 > nul & ")
+                runner.set_cmd_unicode(False)
             self._status.showMessage("输出编码：UTF-8")
         else:
-            self._runner.set_output_encoding(None)
-            self._runner.set_cmd_prefix("")
-            self._runner.set_cmd_unicode(False)
+            for runner in (self._runner, self._workflow_runner):
+                runner.set_output_encoding(None)
+                runner.set_cmd_prefix("")
+                runner.set_cmd_unicode(False)
             self._status.showMessage("输出编码：自动")
 
     def _is_admin(self) -> bool:
@@ -412,14 +607,17 @@ class MainWindow(QMainWindow):
         except Exception:
             return False
 
-    def _restart_as_admin(self) -> None:
-        args = sys.argv
+    def _restart_as_admin(self, command: CommandDefinition) -> None:
+        args = ["--run", command.command_id]
+        exe = sys.executable
         if getattr(sys, "frozen", False):
-            exe = sys.executable
-            params = subprocess.list2cmdline(args[1:])
-        else:
-            exe = sys.executable
             params = subprocess.list2cmdline(args)
+        else:
+            params = subprocess.list2cmdline([sys.argv[0]] + args)
+        # Release the instance name first, otherwise the elevated process
+        # would hand its request back to us and exit.
+        if self._instance:
+            self._instance.close()
         result = ctypes.windll.shell32.ShellExecuteW(
             None,
             "runas",
@@ -429,4 +627,6 @@ class MainWindow(QMainWindow):
             1,
         )
         if result > 32:
-            QApplication.instance().quit()
+            self._exit_app()
+        elif self._instance:
+            self._instance.listen()
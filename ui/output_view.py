@@ -0,0 +1,260 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Pattern, Tuple
+
+from PySide6.QtGui import QColor, QSyntaxHighlighter, QTextCharFormat, QTextCursor
+from PySide6.QtWidgets import (
+    QCheckBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPlainTextEdit,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
+)
+
+from core.line_index import LineIndex, compile_query, normalize_newlines
+
+MAX_VISIBLE_LINES = 10_000
+
+
+class _MatchHighlighter(QSyntaxHighlighter):
+    def __init__(self, document) -> None:
+        super().__init__(document)
+        self._pattern: Optional[Pattern] = None
+        self._format = QTextCharFormat()
+        self._format.setBackground(QColor("#ffe58f"))
+
+    def set_pattern(self, pattern: Optional[Pattern]) -> None:
+        self._pattern = pattern
+        self.rehighlight()
+
+    def highlightBlock(self, text: str) -> None:
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text):
+            if match.end() > match.start():
+                self.setFormat(match.start(), match.end() - match.start(), self._format)
+
+
+class OutputView(QWidget):
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._index = LineIndex()
+        self._filter_only = False
+        # First index line shown while the widget holds an older window than the
+        # tail (after jumping to an evicted match); None while following output.
+        self._window_first: Optional[int] = None
+        self._current: Optional[Tuple[int, int, int]] = None
+        self._pending_cr = False
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        search_bar = QWidget(self)
+        search_layout = QHBoxLayout(search_bar)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        self._query = QLineEdit(self)
+        self._query.setPlaceholderText("搜索输出…")
+        self._query.setClearButtonEnabled(True)
+        self._regex = QCheckBox("正则", self)
+        self._only_matches = QCheckBox("仅显示匹配行", self)
+        self._prev_button = QPushButton("上一个", self)
+        self._next_button = QPushButton("下一个", self)
+        self._match_label = QLabel("", self)
+        search_layout.addWidget(self._query, 1)
+        search_layout.addWidget(self._regex)
+        search_layout.addWidget(self._only_matches)
+        search_layout.addWidget(self._prev_button)
+        search_layout.addWidget(self._next_button)
+        search_layout.addWidget(self._match_label)
+
+        self._editor = QPlainTextEdit(self)
+        self._editor.setReadOnly(True)
+        self._editor.setMaximumBlockCount(MAX_VISIBLE_LINES)
+        self._highlighter = _MatchHighlighter(self._editor.document())
+
+        layout.addWidget(search_bar)
+        layout.addWidget(self._editor, 1)
+
+        self._query.textChanged.connect(self._on_query_changed)
+        self._query.returnPressed.connect(self.find_next)
+        self._regex.toggled.connect(self._on_query_changed)
+        self._only_matches.toggled.connect(self._on_filter_toggled)
+        self._prev_button.clicked.connect(self.find_previous)
+        self._next_button.clicked.connect(self.find_next)
+
+    def toPlainText(self) -> str:
+        return self._editor.toPlainText()
+
+    def append(self, text: str) -> None:
+        text, self._pending_cr = normalize_newlines(text, self._pending_cr)
+        matched = self._index.append(text)
+        if self._window_first is None:
+            if not self._showing_matches():
+                self._insert(text)
+            elif matched:
+                self._insert("".join(f"{line}\n" for _number, line in matched))
+        if matched:
+            self._update_match_label()
+
+    def clear(self) -> None:
+        self._index.clear()
+        self._editor.clear()
+        self._window_first = None
+        self._current = None
+        self._pending_cr = False
+        self._update_match_label()
+
+    def find_next(self) -> None:
+        self._find(forward=True)
+
+    def find_previous(self) -> None:
+        self._find(forward=False)
+
+    def _insert(self, text: str) -> None:
+        cursor = self._editor.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self._editor.setTextCursor(cursor)
+        self._editor.ensureCursorVisible()
+
+    def _on_query_changed(self) -> None:
+        try:
+            pattern = compile_query(self._query.text(), self._regex.isChecked())
+        except re.error:
+            self._query.setStyleSheet("border: 1px solid #d9363e;")
+            return
+        self._query.setStyleSheet("")
+        self._index.set_pattern(pattern)
+        self._highlighter.set_pattern(pattern)
+        self._current = None
+        if self._filter_only or self._window_first is not None:
+            self._render()
+        self._update_match_label()
+
+    def _on_filter_toggled(self, checked: bool) -> None:
+        self._filter_only = checked
+        self._current = None
+        self._render()
+
+    def _render(self) -> None:
+        # Rebuild the widget from the index, which still holds lines the widget
+        # has already evicted past MAX_VISIBLE_LINES.
+        if self._filter_only and self._index.pattern is not None:
+            lines = [line for _number, line in self._index.matching_lines()[-MAX_VISIBLE_LINES:]]
+            text = "".join(f"{line}\n" for line in lines)
+        else:
+            lines = self._index.tail(MAX_VISIBLE_LINES)
+            text = "".join(f"{line}\n" for line in lines) + self._index.partial
+        self._window_first = None
+        self._editor.setPlainText(text)
+        self._editor.moveCursor(QTextCursor.End)
+        self._editor.ensureCursorVisible()
+
+    def _showing_matches(self) -> bool:
+        return self._filter_only and self._index.pattern is not None
+
+    def _render_around(self, number: int) -> None:
+        # Show a window of the index centred on an evicted line. New output
+        # keeps being indexed but is not drawn until the view returns to the tail.
+        half = MAX_VISIBLE_LINES // 2
+        if self._showing_matches():
+            numbers = self._index.match_numbers
+            start = max(0, bisect_left(numbers, number) - half)
+            shown = numbers[start : start + MAX_VISIBLE_LINES - 1]
+        else:
+            first = max(self._index.first_line, number - half)
+            shown = range(first, min(self._index.line_count, first + MAX_VISIBLE_LINES - 1))
+        self._editor.setPlainText("".join(f"{self._index.line(line)}\n" for line in shown))
+        self._window_first = shown[0]
+
+    def _block_of_line(self, number: int) -> Optional[int]:
+        shown = self._editor.document().blockCount() - 1
+        if self._showing_matches():
+            numbers = self._index.match_numbers
+            if self._window_first is None:
+                first = len(numbers) - shown
+            else:
+                first = bisect_left(numbers, self._window_first)
+            block = bisect_left(numbers, number) - first
+        else:
+            first = self._index.line_count - shown if self._window_first is None else self._window_first
+            block = number - first
+        return block if 0 <= block < shown else None
+
+    def _in_tail(self, number: int) -> bool:
+        if self._showing_matches():
+            numbers = self._index.match_numbers
+            return len(numbers) - bisect_left(numbers, number) < MAX_VISIBLE_LINES
+        return self._index.line_count - number < MAX_VISIBLE_LINES
+
+    def _update_match_label(self) -> None:
+        if self._index.pattern is None:
+            self._match_label.setText("")
+            return
+        text = f"{self._index.match_count} 行匹配"
+        if self._current is not None:
+            position = bisect_left(self._index.match_numbers, self._current[0]) + 1
+            text = f"{position}/{text}"
+        if self._window_first is not None:
+            text += "（历史位置，新输出暂不显示）"
+        self._match_label.setText(text)
+
+    def _find(self, forward: bool) -> None:
+        # Navigate by the index's match list rather than the widget, so matches
+        # in lines the widget has already evicted are still reachable.
+        pattern = self._index.pattern
+        numbers = self._index.match_numbers
+        if pattern is None or not numbers:
+            return
+
+        target: Optional[Tuple[int, int, int]] = None
+        if self._current is not None and self._current[0] >= self._index.first_line:
+            number, start, end = self._current
+            spans = self._spans(number)
+            if forward:
+                target = next(((number, s, e) for s, e in spans if s >= end and s > start), None)
+            else:
+                target = next(((number, s, e) for s, e in reversed(spans) if s < start), None)
+        for _ in range(len(numbers) + 1):
+            if target is not None:
+                break
+            if self._current is None or self._current[0] < self._index.first_line:
+                number = numbers[0] if forward else numbers[-1]
+            elif forward:
+                number = numbers[bisect_right(numbers, self._current[0]) % len(numbers)]
+            else:
+                number = numbers[bisect_left(numbers, self._current[0]) - 1]
+            spans = self._spans(number)
+            if not spans:
+                self._current = (number, 0, 0)
+                continue
+            target = (number, *(spans[0] if forward else spans[-1]))
+        if target is not None:
+            self._show_match(target)
+
+    def _spans(self, number: int) -> List[Tuple[int, int]]:
+        return [
+            (match.start(), match.end())
+            for match in self._index.pattern.finditer(self._index.line(number))
+            if match.end() > match.start()
+        ]
+
+    def _show_match(self, target: Tuple[int, int, int]) -> None:
+        number, start, end = target
+        if self._window_first is not None and self._in_tail(number):
+            self._render()
+        block_number = self._block_of_line(number)
+        if block_number is None:
+            self._render_around(number)
+            block_number = self._block_of_line(number)
+        block = self._editor.document().findBlockByNumber(block_number)
+        found = QTextCursor(block)
+        found.setPosition(block.position() + start)
+        found.setPosition(block.position() + end, QTextCursor.KeepAnchor)
+        self._editor.setTextCursor(found)
+        self._editor.ensureCursorVisible()
+        self._current = target
+        self._update_match_label()
@@ -14,6 +14,7 @@ from PySide6.QtWidgets import (
     QPushButton,
 )
 
+from core.command_builder import validate_param_values
 from core.models import ParamDefinition
 
 
@@ -81,30 +82,7 @@ class ParamDialog(QDialog):
         self.accept()
 
     def _validate(self) -> List[str]:
-        errors: List[str] = []
-        for param in self._params:
-            if param.param_id in self._fields:
-                value = self._fields[param.param_id].text().strip()
-            else:
-                value = self._choice_values.get(param.param_id, "")
-            if param.required and not value:
-                errors.append(f"{param.label} is required.")
-                continue
-            if param.kind == "int" and value:
-                try:
-                    number = int(value)
-                except ValueError:
-                    errors.append(f"{param.label} must be an integer.")
-                    continue
-                if param.min_value is not None and number < param.min_value:
-                    errors.append(f"{param.label} must be >= {param.min_value}.")
-                if param.max_value is not None and number > param.max_value:
-                    errors.append(f"{param.label} must be <= {param.max_value}.")
-            if param.choices and value:
-                if value not in param.choices:
-                    allowed = ", ".join(param.choices)
-                    errors.append(f"{param.label} must be one of: {allowed}.")
-        return errors
+        return validate_param_values(self._params, self.values())
 
     def _pick_choice(self, param_id: str, value: str) -> None:
         self._choice_values[param_id] = value